@@ -3,18 +3,49 @@ Advanced Financial Analysis Module
 Handles industry comparisons, health scores, and peer analysis
 """
 
+import contextvars
 import logging
-from typing import Dict, List, Optional, Any
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from financial_scraper import BEIDataScraper
+from company_registry import RegistrySnapshot
+from sector_index import SectorAggregateIndex
+from screener import RatioScreener
+from metrics import stage
+from tracing import annotate
 
 logger = logging.getLogger(__name__)
 
+# Below this many companies the per-company scorer beats the array setup of the batch scorer
+MIN_VECTORIZED_SCORE_BATCH = 16
+
 class AnalysisEngine:
     """Advanced analysis engine for financial data processing"""
     
-    def __init__(self):
-        """Initialize the analysis engine"""
-        self.scraper = BEIDataScraper()
+    def __init__(self, scraper: Optional[BEIDataScraper] = None, max_workers: int = 4, peer_timeout: float = 15.0):
+        """
+        Initialize the analysis engine, sharing the app's scraper when given.
+
+        Sector peers are fetched concurrently on a pool of max_workers threads;
+        a peer that has not answered within peer_timeout seconds is left out
+        of the industry average.
+        """
+        self.scraper = scraper or BEIDataScraper()
+        self.peer_timeout = peer_timeout
+        self._peer_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="peer-fetch")
+        
+        # Running sector sums, kept current by every ratio calculation the scraper makes
+        self.sector_index = SectorAggregateIndex()
+        self.scraper.add_ratio_listener(self.sector_index.update_many)
+        
+        # Sorted per-ratio indexes for the screener, refreshed the same way
+        self.screener = RatioScreener()
+        self.scraper.add_ratio_listener(self._update_screener)
+        
+        # Companies delisted or moved to another sector leave both indexes when the registry reloads
+        self.scraper.registry.add_reload_listener(self._apply_registry_change)
         
         # Industry benchmark data (typical ranges for Indonesian companies)
         self.industry_benchmarks = {
@@ -55,49 +86,30 @@ class AnalysisEngine:
             }
         }
         
+        # Per-sector scoring weights and thresholds as arrays, built on first use by the batch scorer
+        self._score_profiles: Dict[str, Tuple[Tuple[str, ...], np.ndarray]] = {}
+        
         logger.info("Analysis engine initialized with industry benchmarks")
     
+    @stage("industry_average")
     def calculate_industry_average(self, sector: str) -> Dict[str, Any]:
         """Calculate industry averages for a specific sector"""
         try:
             logger.info(f"Calculating industry average for sector: {sector}")
+            annotate(sector=sector)
             
             # Get all companies in the same sector
-            sector_companies = []
-            for ticker, info in self.scraper.companies.items():
-                if info["sector"] == sector:
-                    sector_companies.append(ticker)
+            sector_companies = self.sector_companies(sector)
             
             if len(sector_companies) < 2:
                 logger.warning(f"Not enough companies in sector {sector} for meaningful average")
                 return self._get_default_industry_average(sector)
             
-            # Calculate averages from multiple companies
             total_companies = len(sector_companies)
-            sector_ratios = {}
-            successful_calculations = 0
-            
-            for ticker in sector_companies:
-                try:
-                    company_ratios = self.scraper.calculate_ratios(ticker)
-                    if company_ratios and company_ratios.get('ratios'):
-                        successful_calculations += 1
-                        ratios = company_ratios['ratios']
-                        
-                        for ratio_name, value in ratios.items():
-                            if ratio_name not in sector_ratios:
-                                sector_ratios[ratio_name] = []
-                            sector_ratios[ratio_name].append(value)
-                
-                except Exception as e:
-                    logger.warning(f"Could not get ratios for {ticker}: {str(e)}")
-                    continue
             
-            # Calculate averages
-            industry_averages = {}
-            for ratio_name, values in sector_ratios.items():
-                if values:
-                    industry_averages[ratio_name] = sum(values) / len(values)
+            self.ensure_sector_indexed(sector)
+            
+            industry_averages, successful_calculations = self.sector_index.averages(sector)
             
             # Ensure we have some key ratios
             if not industry_averages:
@@ -118,6 +130,104 @@ class AnalysisEngine:
             logger.error(f"Error calculating industry average for {sector}: {str(e)}")
             return self._get_default_industry_average(sector)
     
+    def sector_companies(self, sector: str) -> List[str]:
+        """Tickers of every known company in a sector"""
+        return list(self.scraper.registry.sector_tickers(sector))
+    
+    def ensure_sector_indexed(self, sector: str) -> List[str]:
+        """Make sure every company of a sector is in the sector index; returns the sector's tickers"""
+        sector_companies = self.sector_companies(sector)
+        
+        # Only peers the index has never seen need fetching; their ratio
+        # calculations feed the index through the scraper's listener
+        missing = [ticker for ticker in sector_companies if ticker not in self.sector_index]
+        if missing:
+            self._fetch_peer_ratios(missing)
+        
+        return sector_companies
+    
+    def sector_percentiles(self, sector: str, ratios: Dict[str, float]) -> Dict[str, float]:
+        """Percentile rank of each ratio among the company's sector peers (a binary search per ratio)"""
+        try:
+            return self.sector_index.percentile_ranks(sector, ratios)
+        except Exception as e:
+            logger.error(f"Error calculating sector percentiles for {sector}: {str(e)}")
+            return {}
+    
+    def sector_distribution(self, sector: str) -> Dict[str, Any]:
+        """Distribution statistics of every ratio across a sector"""
+        sector_companies = self.ensure_sector_indexed(sector)
+        _, indexed_companies = self.sector_index.averages(sector)
+        
+        return {
+            "sector": sector,
+            "total_companies_in_sector": len(sector_companies),
+            "successful_calculations": indexed_companies,
+            "ratios": self.sector_index.distribution(sector)
+        }
+    
+    def _update_screener(self, updates: List[Tuple[str, str, Dict[str, float]]]) -> None:
+        """Re-index companies in the screener whenever their ratios are recalculated"""
+        health_scores = self.calculate_health_scores_batch(
+            {ticker: ratios for ticker, _, ratios in updates},
+            {ticker: sector for ticker, sector, _ in updates}
+        )
+        for ticker, sector, ratios in updates:
+            self.screener.update(ticker, sector, ratios, health_scores[ticker])
+    
+    def _apply_registry_change(self, previous: RegistrySnapshot, current: RegistrySnapshot) -> None:
+        """
+        Drop index entries for companies that left the universe or changed
+        sector, and release delisted companies' columnar rows
+        """
+        for ticker, info in previous.companies.items():
+            listed = current.companies.get(ticker)
+            if listed is None or listed["sector"] != info["sector"]:
+                self.sector_index.remove(ticker)
+                self.screener.remove(ticker)
+            if listed is None:
+                self.scraper.columns.forget(ticker)
+    
+    def rebuild_sector_index(self) -> int:
+        """
+        Repopulate the sector index from statements already in the store.
+        Outdated statements are used as they are rather than refetched, so
+        this never calls the provider.
+        """
+        tickers = self.scraper.stored_tickers()
+        self.scraper.calculate_ratios_batch(tickers, store_only=True)
+        logger.info(f"Rebuilt sector index from {len(tickers)} stored companies")
+        return len(tickers)
+    
+    def _fetch_peer_ratios(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Calculate ratios for several peers concurrently, skipping failures and slow peers"""
+        return self._run_concurrently(self.scraper.calculate_ratios, tickers)
+    
+    def prefetch_financial_data(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Load statements for several companies concurrently (memoized in the caller's unit of work)"""
+        return self._run_concurrently(self.scraper.get_financial_data, tickers)
+    
+    def _run_concurrently(self, fn: Callable[[str], Any], tickers: List[str]) -> Dict[str, Any]:
+        """Run fn for each ticker on the peer pool, leaving out failures and tickers past the deadline"""
+        futures = {}
+        for ticker in tickers:
+            # Run each peer in a copy of the caller's context so it joins the request's unit of work
+            context = contextvars.copy_context()
+            futures[ticker] = self._peer_executor.submit(context.run, fn, ticker)
+        
+        deadline = time.monotonic() + self.peer_timeout
+        results = {}
+        for ticker, future in futures.items():
+            try:
+                results[ticker] = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            except FuturesTimeoutError:
+                logger.warning(f"Timed out waiting on {ticker} after {self.peer_timeout}s")
+                future.cancel()
+            except Exception as e:
+                logger.warning(f"Could not get data for {ticker}: {str(e)}")
+        
+        return results
+    
     def _get_default_industry_average(self, sector: str) -> Dict[str, Any]:
         """Return default industry averages when calculation fails"""
         defaults = {
@@ -160,6 +270,7 @@ class AnalysisEngine:
             "assetTurnover": 0.8
         })
     
+    @stage("health_score")
     def calculate_health_score(self, ratios_data: Dict[str, Any], sector: str) -> int:
         """Calculate financial health score (0-100) based on ratios and sector"""
         try:
@@ -169,52 +280,7 @@ class AnalysisEngine:
                 logger.warning("No ratios data provided for health score calculation")
                 return 50  # Default neutral score
             
-            ratios = ratios_data['ratios']
-            benchmarks = self.industry_benchmarks.get(sector, self.industry_benchmarks['default'])
-            
-            total_score = 0
-            max_possible_score = 0
-            
-            # Define weights for different ratio categories
-            if sector == "Banking":
-                score_weights = {
-                    'roe': 30,      # 30% weight
-                    'roa': 25,      # 25% weight
-                    'nim': 20,      # 20% weight
-                    'ldr': 15,      # 15% weight
-                    'car': 10       # 10% weight
-                }
-            else:
-                score_weights = {
-                    'currentRatio': 20,     # 20% weight - Liquidity
-                    'roe': 25,              # 25% weight - Profitability
-                    'roa': 20,              # 20% weight - Profitability
-                    'der': 20,              # 20% weight - Leverage
-                    'assetTurnover': 15     # 15% weight - Activity
-                }
-            
-            # Calculate score for each available ratio
-            for ratio_name, weight in score_weights.items():
-                if ratio_name in ratios and ratio_name in benchmarks:
-                    ratio_value = ratios[ratio_name]
-                    benchmark = benchmarks[ratio_name]
-                    
-                    # Calculate ratio score (0-100)
-                    ratio_score = self._calculate_ratio_score(
-                        ratio_value, benchmark, ratio_name
-                    )
-                    
-                    total_score += ratio_score * (weight / 100)
-                    max_possible_score += weight
-            
-            # Calculate final health score
-            if max_possible_score > 0:
-                health_score = int((total_score / max_possible_score) * 100)
-            else:
-                health_score = 50  # Default if no ratios could be scored
-            
-            # Ensure score is within bounds
-            health_score = max(0, min(100, health_score))
+            health_score = self._score_company(ratios_data['ratios'], sector)
             
             logger.info(f"Calculated health score: {health_score}")
             return health_score
@@ -223,6 +289,183 @@ class AnalysisEngine:
             logger.error(f"Error calculating health score: {str(e)}")
             return 50  # Return neutral score on error
     
+    def _score_company(self, ratios: Dict[str, float], sector: str) -> int:
+        """The health score arithmetic for one company, without logging or error handling"""
+        benchmarks = self.industry_benchmarks.get(sector, self.industry_benchmarks['default'])
+        
+        total_score = 0
+        max_possible_score = 0
+        
+        # Define weights for different ratio categories
+        score_weights = self._get_score_weights(sector)
+        
+        # Calculate score for each available ratio
+        for ratio_name, weight in score_weights.items():
+            if ratio_name in ratios and ratio_name in benchmarks:
+                ratio_value = ratios[ratio_name]
+                benchmark = benchmarks[ratio_name]
+                
+                # Calculate ratio score (0-100)
+                ratio_score = self._calculate_ratio_score(
+                    ratio_value, benchmark, ratio_name
+                )
+                
+                total_score += ratio_score * (weight / 100)
+                max_possible_score += weight
+        
+        # Calculate final health score
+        if max_possible_score > 0:
+            health_score = int((total_score / max_possible_score) * 100)
+        else:
+            health_score = 50  # Default if no ratios could be scored
+        
+        # Ensure score is within bounds
+        health_score = max(0, min(100, health_score))
+        
+        return health_score
+    
+    def _get_score_weights(self, sector: str) -> Dict[str, int]:
+        """Weights (summing to 100) of the ratios that make up a sector's health score"""
+        if sector == "Banking":
+            return {
+                'roe': 30,      # 30% weight
+                'roa': 25,      # 25% weight
+                'nim': 20,      # 20% weight
+                'ldr': 15,      # 15% weight
+                'car': 10       # 10% weight
+            }
+        
+        return {
+            'currentRatio': 20,     # 20% weight - Liquidity
+            'roe': 25,              # 25% weight - Profitability
+            'roa': 20,              # 20% weight - Profitability
+            'der': 20,              # 20% weight - Leverage
+            'assetTurnover': 15     # 15% weight - Activity
+        }
+    
+    def _score_profile(self, sector: str) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        A sector's scored ratios in weight order and, for each of them, one row
+        of (weight, has benchmark, lower is better, fair, good, excellent)
+        """
+        profile = self._score_profiles.get(sector)
+        if profile is None:
+            benchmarks = self.industry_benchmarks.get(sector, self.industry_benchmarks['default'])
+            weights = self._get_score_weights(sector)
+            no_benchmark = {'fair': np.nan, 'good': np.nan, 'excellent': np.nan}
+            profile = self._score_profiles[sector] = (
+                tuple(weights),
+                np.array([
+                    [weight, name in benchmarks, name in ['der', 'dar']] +
+                    [benchmarks.get(name, no_benchmark)[level] for level in ('fair', 'good', 'excellent')]
+                    for name, weight in weights.items()
+                ], dtype=float)
+            )
+        return profile
+    
+    @stage("health_score_batch")
+    def calculate_health_scores_batch(self, ratios_by_ticker: Dict[str, Dict[str, float]],
+                                      sectors: Dict[str, str]) -> Dict[str, int]:
+        """
+        Score many companies at once; identical to calculate_health_score per company.
+
+        Every company's scored ratios form one row of a companies x ratios
+        matrix, with weights and thresholds looked up per row from its sector,
+        so the whole batch is bucketed and summed in a fixed number of array
+        operations. Small batches (e.g. the screener's single-company updates)
+        are scored company by company instead.
+        """
+        tickers = list(ratios_by_ticker)
+        try:
+            if len(tickers) < MIN_VECTORIZED_SCORE_BATCH:
+                scores = {ticker: self._score_company(ratios_by_ticker[ticker], sectors[ticker]) for ticker in tickers}
+            else:
+                scores = self._score_batch(tickers, ratios_by_ticker, sectors)
+        except Exception as e:
+            logger.error(f"Error calculating batch health scores: {str(e)}")
+            scores = {ticker: 50 for ticker in tickers}
+        
+        logger.info(f"Calculated health scores for {len(scores)} companies")
+        return scores
+    
+    def _score_batch(self, tickers: List[str], ratios_by_ticker: Dict[str, Dict[str, float]],
+                     sectors: Dict[str, str]) -> Dict[str, int]:
+        """Vectorized health scores for companies of any mix of sectors"""
+        if not tickers:
+            return {}
+        
+        # Row i uses profile rows[i]; per-row weights and thresholds are gathered from the profiles by index
+        sector_rows: Dict[str, int] = {}
+        rows = [sector_rows.setdefault(sectors[ticker], len(sector_rows)) for ticker in tickers]
+        profiles = [self._score_profile(sector) for sector in sector_rows]
+        names = [profiles[row][0] for row in rows]
+        
+        values = np.array([
+            [ratios_by_ticker[ticker].get(name, np.nan) for name in ratio_names]
+            for ticker, ratio_names in zip(tickers, names)
+        ], dtype=float)
+        present = np.array([
+            [name in ratios_by_ticker[ticker] for name in ratio_names]
+            for ticker, ratio_names in zip(tickers, names)
+        ])
+        
+        table = np.stack([profile[1] for profile in profiles])[np.array(rows)]
+        weights = table[..., 0]
+        present &= table[..., 1] > 0
+        lower_is_better = table[..., 2] > 0
+        thresholds = table[..., 3:]
+        
+        # Thresholds differ per row, so np.digitize's shared bins are replaced by one broadcast
+        # comparison per level: higher is better counts >= fair/good/excellent, lower is better
+        # counts <= them. NaN compares false everywhere and lands in the lowest bucket, like the
+        # scalar path.
+        with np.errstate(invalid='ignore'):
+            reached = np.where(
+                lower_is_better[..., None],
+                values[..., None] <= thresholds,
+                values[..., None] >= thresholds
+            ).sum(axis=2)
+        weighted = np.where(present, (25 + 25 * reached) * (weights / 100), 0)
+        max_possible_score = np.where(present, weights, 0).sum(axis=1)
+        
+        # Accumulate column by column in weight order so the float sums round like the scalar path
+        total_score = np.zeros(len(tickers))
+        for column in range(weighted.shape[1]):
+            total_score += weighted[:, column]
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            health = np.where(
+                max_possible_score > 0,
+                np.trunc((total_score / max_possible_score) * 100),
+                50
+            )
+        health = np.minimum(np.maximum(health, 0), 100).astype(int)
+        
+        return dict(zip(tickers, health.tolist()))
+    
+    def summarize_companies(self, tickers: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """summarize_company for many tickers: one vectorized ratio pass and one batch scoring pass"""
+        ratios_data = self.scraper.calculate_ratios_batch(tickers)
+        available = {ticker: data for ticker, data in ratios_data.items() if data}
+        
+        infos = {ticker: self.scraper.get_company_info(ticker) for ticker in available}
+        health_scores = self.calculate_health_scores_batch(
+            {ticker: data['ratios'] for ticker, data in available.items()},
+            {ticker: info['sector'] for ticker, info in infos.items()}
+        )
+        
+        summaries: Dict[str, Optional[Dict[str, Any]]] = {ticker: None for ticker in tickers}
+        for ticker, data in available.items():
+            summaries[ticker] = {
+                "ticker": ticker,
+                "name": infos[ticker]['name'],
+                "sector": infos[ticker]['sector'],
+                "period": data.get('period'),
+                "ratios": data['ratios'],
+                "health_score": health_scores[ticker]
+            }
+        return summaries
+    
     def _calculate_ratio_score(self, value: float, benchmark: Dict[str, float], ratio_name: str) -> float:
         """Calculate score for individual ratio (0-100)"""
         try:
@@ -322,44 +565,71 @@ class AnalysisEngine:
         
         return display_names.get(ratio_name, ratio_name.title())
     
-    def compare_companies_detailed(self, ticker1: str, ticker2: str) -> Dict[str, Any]:
-        """Perform detailed comparison between two companies"""
+    def summarize_company(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Per-company computed results (ratios and health score) shared by every view"""
+        try:
+            company_info = self.scraper.get_company_info(ticker)
+            if not company_info:
+                return None
+            
+            ratios_data = self.scraper.calculate_ratios(ticker)
+            if not ratios_data:
+                return None
+            
+            return {
+                "ticker": ticker,
+                "name": company_info['name'],
+                "sector": company_info['sector'],
+                "period": ratios_data.get('period'),
+                "ratios": ratios_data['ratios'],
+                "health_score": self.calculate_health_score(ratios_data, company_info['sector'])
+            }
+            
+        except Exception as e:
+            logger.error(f"Error summarizing {ticker}: {str(e)}")
+            return None
+    
+    def compare_companies_detailed(self, ticker1: str, ticker2: str,
+                                   get_summary: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """
+        Perform detailed comparison between two companies.
+
+        get_summary lets callers supply already computed company summaries
+        (e.g. from the API's shared per-ticker cache) instead of recomputing them.
+        """
         try:
             logger.info(f"Performing detailed comparison: {ticker1} vs {ticker2}")
             
+            get_summary = get_summary or self.summarize_company
+            
             # Get data for both companies
-            company1_data = self.scraper.calculate_ratios(ticker1)
-            company2_data = self.scraper.calculate_ratios(ticker2)
+            summary1 = get_summary(ticker1)
+            summary2 = get_summary(ticker2)
             
-            if not company1_data or not company2_data:
+            if not summary1 or not summary2:
                 raise ValueError("Could not get data for one or both companies")
             
-            # Get company info
-            company1_info = self.scraper.get_company_info(ticker1)
-            company2_info = self.scraper.get_company_info(ticker2)
-            
-            # Calculate health scores
-            health1 = self.calculate_health_score(company1_data, company1_info['sector'])
-            health2 = self.calculate_health_score(company2_data, company2_info['sector'])
+            health1 = summary1['health_score']
+            health2 = summary2['health_score']
             
             # Analyze strengths/weaknesses
-            analysis1 = self.analyze_company_strengths_weaknesses(company1_data, company1_info['sector'])
-            analysis2 = self.analyze_company_strengths_weaknesses(company2_data, company2_info['sector'])
+            analysis1 = self.analyze_company_strengths_weaknesses(summary1, summary1['sector'])
+            analysis2 = self.analyze_company_strengths_weaknesses(summary2, summary2['sector'])
             
             comparison_result = {
                 "company1": {
                     "ticker": ticker1,
-                    "name": company1_info['name'],
-                    "sector": company1_info['sector'],
-                    "ratios": company1_data['ratios'],
+                    "name": summary1['name'],
+                    "sector": summary1['sector'],
+                    "ratios": summary1['ratios'],
                     "health_score": health1,
                     "analysis": analysis1
                 },
                 "company2": {
                     "ticker": ticker2,
-                    "name": company2_info['name'],
-                    "sector": company2_info['sector'],
-                    "ratios": company2_data['ratios'],
+                    "name": summary2['name'],
+                    "sector": summary2['sector'],
+                    "ratios": summary2['ratios'],
                     "health_score": health2,
                     "analysis": analysis2
                 },
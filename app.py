@@ -3,55 +3,370 @@ FinDash Indonesia Backend API
 A Flask-based API for Indonesian public company financial analysis
 """
 
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request, g
+from flask.json.provider import DefaultJSONProvider
+from collections.abc import Mapping
 from flask_cors import CORS
 import logging
+import math
+import os
+import threading
 from datetime import datetime, timedelta
 import json
+import time
+import cProfile
+import io
+import pstats
+import uuid
 from financial_scraper import BEIDataScraper
 from analysis_module import AnalysisEngine
+from statement_providers import create_provider
+from statement_store import StatementStore
+from company_registry import DEFAULT_COMPANIES_FILE, CompanyRegistry
+from unit_of_work import begin_unit_of_work, current_unit_of_work, end_unit_of_work, unit_of_work
+from ratio_engine import BANKING_RATIOS, NON_BANKING_RATIOS
+from cache_manager import TTLCache
+from shared_cache import SharedCacheBackend
+from response_encoding import EncodedBody, combine_etags, dumps, encode_body
+from prefetch import PrefetchScheduler
+import metrics
+from tracing import annotate, finish_trace, span, start_trace, tracing_active
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class FinDashJSONProvider(DefaultJSONProvider):
+    """jsonify() that also accepts the columnar store's read-only ratio views"""
+    
+    @staticmethod
+    def default(value):
+        if isinstance(value, Mapping):
+            return dict(value)
+        return DefaultJSONProvider.default(value)
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = FinDashJSONProvider(app)
 CORS(app)  # Enable CORS for frontend communication
 
+# Statement source configuration ("yfinance", "fixture" for offline replay, "synthetic" or "http")
+STATEMENT_PROVIDER = os.environ.get('FINDASH_PROVIDER', 'yfinance')
+FIXTURE_DIR = os.environ.get('FINDASH_FIXTURE_DIR', 'fixtures/statements')
+# Simulated upstream delay in seconds for the "synthetic" provider (benchmarks, load tests)
+SYNTHETIC_LATENCY = float(os.environ.get('FINDASH_SYNTHETIC_LATENCY', '0'))
+# Base URL of the statement service for the "http" provider (e.g. the load-test stand-in upstream)
+UPSTREAM_URL = os.environ.get('FINDASH_UPSTREAM_URL', '')
+UPSTREAM_TIMEOUT = float(os.environ.get('FINDASH_UPSTREAM_TIMEOUT', '10'))
+STATEMENT_STORE_PATH = os.environ.get('FINDASH_STATEMENT_STORE', 'data/statements.sqlite3')
+STATEMENT_MAX_AGE = float(os.environ['FINDASH_STATEMENT_MAX_AGE']) if os.environ.get('FINDASH_STATEMENT_MAX_AGE') else None
+
+# Concurrency for sector peer fetches inside industry averages
+PEER_FETCH_WORKERS = int(os.environ.get('FINDASH_PEER_WORKERS', '4'))
+PEER_FETCH_TIMEOUT = float(os.environ.get('FINDASH_PEER_TIMEOUT', '15'))
+
+# Company universe file (JSON or CSV) and how often it is checked for changes (0 disables hot reload)
+COMPANIES_FILE = os.environ.get('FINDASH_COMPANIES_FILE', DEFAULT_COMPANIES_FILE)
+COMPANIES_RELOAD_INTERVAL = float(os.environ.get('FINDASH_COMPANIES_RELOAD_INTERVAL', '30'))
+
 # Initialize data scraper and analysis engine
-scraper = BEIDataScraper()
-analyzer = AnalysisEngine()
+registry = CompanyRegistry(COMPANIES_FILE, reload_interval=COMPANIES_RELOAD_INTERVAL or None)
+statement_store = StatementStore(STATEMENT_STORE_PATH, max_age=STATEMENT_MAX_AGE) if STATEMENT_STORE_PATH else None
+scraper = BEIDataScraper(
+    provider=create_provider(STATEMENT_PROVIDER, fixture_dir=FIXTURE_DIR, latency=SYNTHETIC_LATENCY,
+                             url=UPSTREAM_URL, timeout=UPSTREAM_TIMEOUT),
+    store=statement_store,
+    registry=registry
+)
+analyzer = AnalysisEngine(scraper, max_workers=PEER_FETCH_WORKERS, peer_timeout=PEER_FETCH_TIMEOUT)
+analyzer.rebuild_sector_index()
 
-# Simple in-memory cache (1 hour expiration)
-cache = {}
+# Bounded in-memory cache (LRU eviction, TTL per key family)
 CACHE_EXPIRY = 3600  # 1 hour in seconds
+CACHE_MAX_ENTRIES = int(os.environ.get('FINDASH_CACHE_MAX_ENTRIES', '2000'))
+# Byte budget covering each cached value and its encoded response bodies (unset: entry limit only)
+CACHE_MAX_BYTES = int(os.environ['FINDASH_CACHE_MAX_BYTES']) if os.environ.get('FINDASH_CACHE_MAX_BYTES') else None
+# Seconds past its TTL an entry is still served while it refreshes in the background (0 disables)
+CACHE_STALE_WINDOW = float(os.environ.get('FINDASH_CACHE_STALE_WINDOW', '0'))
+# SQLite file shared by every worker process on the host (empty disables the shared tier)
+SHARED_CACHE_PATH = os.environ.get('FINDASH_SHARED_CACHE', '')
+# Seconds a worker may hold the right to compute a key before others take over
+SHARED_CACHE_LEASE = float(os.environ.get('FINDASH_SHARED_CACHE_LEASE', '30'))
+CACHE_TTLS = {
+    'companies_list': 24 * 3600,  # The company universe rarely changes
+    'sectors_data': 24 * 3600,
+    'company_data_': CACHE_EXPIRY,
+    'company_summary_': CACHE_EXPIRY
+}
+
+cache = TTLCache(
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    default_ttl=CACHE_EXPIRY,
+    family_ttls=CACHE_TTLS,
+    stale_window=CACHE_STALE_WINDOW,
+    encode=encode_body,  # serialized and compressed once per cached value, not once per hit
+    shared=SharedCacheBackend(SHARED_CACHE_PATH) if SHARED_CACHE_PATH else None,
+    lease_timeout=SHARED_CACHE_LEASE
+)
+
+def invalidate_universe_responses(previous, current):
+    """
+    Start from an empty response cache when the company universe changes:
+    lists, sector peers and every industry average may differ
+    """
+    logger.info(f"Company universe changed (version {previous.version} -> {current.version}); clearing response cache")
+    cache.clear()
+
+registry.add_reload_listener(invalidate_universe_responses)
+registry.watch()
+
+# Optional warm-up of the whole universe at startup and periodic prefetch
+WARMUP_ENABLED = os.environ.get('FINDASH_WARMUP', '0') == '1'
+PREFETCH_INTERVAL = float(os.environ.get('FINDASH_PREFETCH_INTERVAL', '0'))
+PREFETCH_WORKERS = int(os.environ.get('FINDASH_PREFETCH_WORKERS', '4'))
+
+# Maximum number of tickers accepted by /api/companies/batch and /api/compare
+MAX_BATCH_SIZE = int(os.environ.get('FINDASH_MAX_BATCH_SIZE', '50'))
+MAX_COMPARE_SIZE = int(os.environ.get('FINDASH_MAX_COMPARE_SIZE', '10'))
+
+# Per-request timing trees (?trace=1 or X-Debug-Trace: 1) and optional cProfile dumps
+# (?trace=1&profile=1) written to FINDASH_PROFILE_DIR; profiling is off unless it is set
+TRACE_ENABLED = os.environ.get('FINDASH_TRACE', '1') == '1'
+PROFILE_DIR = os.environ.get('FINDASH_PROFILE_DIR', '')
+TRACEABLE_ENDPOINTS = {'get_company_data', 'compare_companies'}
+PROFILE_TOP_FUNCTIONS = 25
+
+# Paging limits for /api/screen
+DEFAULT_SCREEN_LIMIT = 20
+MAX_SCREEN_LIMIT = 200
+# Seconds before a company the screener could not index is tried again (doubling per failure, capped)
+SCREEN_RETRY_INTERVAL = float(os.environ.get('FINDASH_SCREEN_RETRY_INTERVAL', '300'))
+SCREEN_RETRY_MAX_INTERVAL = float(os.environ.get('FINDASH_SCREEN_RETRY_MAX_INTERVAL', str(24 * 3600)))
+
+# Trend series options for /api/company/<ticker>
+DEFAULT_TREND_PERIODS = 4
+MAX_TREND_PERIODS = 20
+TREND_RATIOS = set(BANKING_RATIOS) | set(NON_BANKING_RATIOS)
+
+class APIError(Exception):
+    """An error response raised from inside a (possibly shared) computation"""
+    
+    def __init__(self, status, error, message, **extra):
+        super().__init__(message)
+        self.status = status
+        self.error = error
+        self.message = message
+        self.extra = extra
+    
+    def to_response(self):
+        return jsonify({"error": self.error, "message": self.message, **self.extra}), self.status
+
+def _compute_in_unit_of_work(compute):
+    # Background refreshes run outside any request, so give them their own memo
+    def run():
+        with unit_of_work():
+            return compute()
+    return run
+
+def _representation_etag(etag, encoding):
+    # Each content encoding is a different byte sequence, so it gets its own tag
+    return etag if encoding is None else f"{etag}-{encoding}"
+
+def conditional_json_response(etag, encode, max_age, age, cache_status, weak=False):
+    """
+    Send the EncodedBody returned by encode() in the best content encoding
+    the client accepts, with ETag and Cache-Control validators, or answer
+    304 Not Modified without calling encode when If-None-Match already
+    names this entity. Age and X-Cache tell the client how fresh the data is.
+    """
+    # A traced response carries its own timing tree, so it is always sent in full and uncompressed
+    traced = tracing_active()
+    for encoding in (None, 'gzip', 'br'):
+        tag = _representation_etag(etag, encoding)
+        if not traced and request.if_none_match.contains_weak(tag):
+            response = app.response_class(status=304)
+            response.set_etag(tag, weak=weak)
+            break
+    else:
+        encoding, body = (None, encode().identity) if traced else encode().select(request.accept_encodings)
+        response = app.response_class(body, mimetype='application/json')
+        if encoding is not None:
+            response.headers['Content-Encoding'] = encoding
+        response.set_etag(_representation_etag(etag, encoding), weak=weak)
+    
+    response.vary.add('Accept-Encoding')
+    response.headers['Cache-Control'] = f"public, max-age={int(max_age)}"
+    response.headers['Age'] = str(int(age))
+    response.headers['X-Cache'] = cache_status.upper()
+    return response
 
-def is_cache_valid(timestamp):
-    """Check if cached data is still valid (within 1 hour)"""
-    return datetime.now().timestamp() - timestamp < CACHE_EXPIRY
+def json_response(payload, status=200):
+    """Send an uncached payload through the same encoder as cached ones, so NaN is written as null"""
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
 
-def get_from_cache(key):
-    """Get data from cache if valid"""
-    if key in cache:
-        data, timestamp = cache[key]
-        if is_cache_valid(timestamp):
-            return data
-    return None
+def cached_json_response(key, compute):
+    """
+    Serve a key from cache (stale entries while they refresh in the background),
+    or compute it exactly once however many requests are waiting for it.
+    """
+    with span("response_cache", key=key):
+        result = cache.lookup(key, _compute_in_unit_of_work(compute))
+        annotate(cache=result.status)
+    encoded = result.encoded or encode_body(result.value)
+    return conditional_json_response(encoded.etag, lambda: encoded, cache.ttl_for(key), result.age, result.status)
 
-def set_cache(key, data):
-    """Store data in cache with timestamp"""
-    cache[key] = (data, datetime.now().timestamp())
+@app.before_request
+def start_request_metrics():
+    """Count the request as in flight and start its latency timer"""
+    g.request_started = time.perf_counter()
+    g.metrics_endpoint = request.endpoint or 'unmatched'
+    metrics.REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+@app.before_request
+def start_request_trace():
+    """Begin a timing tree (and optionally a cProfile run) when the client asks for one"""
+    if not TRACE_ENABLED or request.endpoint not in TRACEABLE_ENDPOINTS:
+        return
+    if request.args.get('trace') != '1' and request.headers.get('X-Debug-Trace') != '1':
+        return
+    
+    g.trace = start_trace(request.endpoint, path=request.full_path)
+    if PROFILE_DIR and request.args.get('profile') == '1':
+        try:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+        except Exception as e:
+            # Only one profiler can be active per thread (per process on newer Pythons)
+            logger.warning(f"Could not profile request: {str(e)}")
+            g.profiler = None
+
+@app.before_request
+def open_unit_of_work():
+    """Start a request-scoped memo so each ticker is fetched at most once per request"""
+    # The ASGI front end (asgi_app.py) opens and preloads one before dispatching here
+    g.unit_of_work = current_unit_of_work()
+    if g.unit_of_work is None:
+        g.unit_of_work, g.unit_of_work_token = begin_unit_of_work()
+
+@app.after_request
+def report_unit_of_work(response):
+    """Expose how much upstream work the request actually did"""
+    uow = g.get('unit_of_work')
+    if uow is not None:
+        response.headers['X-Statement-Fetches'] = str(uow.computations['statements'])
+        response.headers['X-Ratio-Calculations'] = str(uow.computations['ratios'])
+    return response
+
+@app.after_request
+def record_request_metrics(response):
+    """Observe the request's latency by endpoint, method and status"""
+    started = g.get('request_started')
+    if started is not None:
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            endpoint=g.metrics_endpoint, method=request.method, status=str(response.status_code)
+        )
+    return response
+
+def _finish_profile(profiler):
+    """Dump a request's cProfile stats to PROFILE_DIR and summarize the hottest functions"""
+    profiler.disable()
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    path = os.path.join(
+        PROFILE_DIR, f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{request.endpoint}-{uuid.uuid4().hex[:8]}.prof"
+    )
+    profiler.dump_stats(path)
+    
+    summary = io.StringIO()
+    pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+    return {"path": path, "top": [line for line in summary.getvalue().splitlines() if line.strip()]}
+
+@app.after_request
+def attach_request_trace(response):
+    """Add the finished timing tree (and profile summary) to a traced JSON response"""
+    trace = g.pop('trace', None)
+    if trace is None:
+        return response
+    
+    tree = finish_trace(*trace)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        tree['profile'] = _finish_profile(profiler)
+    
+    if response.mimetype == 'application/json' and 'Content-Encoding' not in response.headers:
+        data = json.loads(response.get_data())
+        if isinstance(data, dict):
+            data['trace'] = tree
+            response.set_data(dumps(data))
+            # The body is unique to this request
+            del response.headers['ETag']
+            response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@app.teardown_request
+def finish_request_trace(error=None):
+    """Stop a trace the request did not get to finish (e.g. after an unhandled error)"""
+    trace = g.pop('trace', None)
+    if trace is not None:
+        finish_trace(*trace)
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+
+@app.teardown_request
+def finish_request_metrics(error=None):
+    """Take the request out of the in-flight gauge, however it ended"""
+    endpoint = g.pop('metrics_endpoint', None)
+    if endpoint is not None:
+        metrics.REQUESTS_IN_FLIGHT.dec(endpoint=endpoint)
+
+@app.teardown_request
+def close_unit_of_work(error=None):
+    """Drop the request-scoped memo"""
+    token = g.pop('unit_of_work_token', None)
+    if token is not None:
+        end_unit_of_work(token)
 
 @app.route('/')
 def health_check():
-    """API health check endpoint"""
+    """API health check endpoint; answers 503 until warm-up finishes so load balancers wait"""
+    ready = prefetcher.ready or not (WARMUP_ENABLED or PREFETCH_INTERVAL)
     return jsonify({
-        "status": "healthy",
+        "status": "healthy" if ready else "warming",
         "message": "FinDash Indonesia API is running",
         "timestamp": datetime.now().isoformat(),
-        "version": "1.0.0"
-    })
+        "version": "1.0.0",
+        "ready": ready,
+        "prefetch": prefetcher.status(),
+        "companies": registry.status(),
+        "cache": cache.stats()
+    }), 200 if ready else 503
+
+def _runtime_metrics():
+    """Cache and fetch state reported at scrape time"""
+    stats = cache.stats()
+    for name in ('hits', 'misses', 'evictions', 'expirations', 'stale_hits', 'refreshes',
+                 'coalesced', 'shared_hits', 'lease_waits'):
+        yield f"findash_cache_{name}_total", "counter", f"Response cache {name.replace('_', ' ')}", {}, stats[name]
+    yield "findash_cache_entries", "gauge", "Entries held by the response cache", {}, stats['entries']
+    yield "findash_companies", "gauge", "Companies in the loaded universe", {}, len(registry)
+    yield "findash_companies_version", "gauge", "Version of the loaded company universe", {}, registry.version
+    yield "findash_columnar_bytes", "gauge", "Bytes held by the columnar ratio and line item store", {}, \
+        scraper.columns.stats()['bytes']
+    if stats['bytes'] is not None:
+        yield "findash_cache_bytes", "gauge", "Estimated bytes held by the response cache", {}, stats['bytes']
+    fetches = scraper.fetch_stats()
+    yield "findash_statement_fetches_in_flight", "gauge", "Statement loads currently in progress", {}, fetches['in_flight']
+    yield ("findash_statement_fetches_coalesced_total", "counter",
+           "Statement loads that joined one already in progress", {}, fetches['coalesced'])
+
+metrics.registry.add_collector(_runtime_metrics)
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus text-format metrics for this process"""
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/api/companies')
 def get_companies():
@@ -59,19 +374,10 @@ def get_companies():
     try:
         logger.info("Fetching companies list")
         
-        # Check cache first
-        cached_data = get_from_cache('companies_list')
-        if cached_data:
-            logger.info("Returning cached companies list")
-            return jsonify(cached_data)
-        
-        companies = scraper.get_companies_list()
+        response = cached_json_response('companies_list', scraper.get_companies_list)
         
-        # Cache the result
-        set_cache('companies_list', companies)
-        
-        logger.info(f"Successfully fetched {len(companies)} companies")
-        return jsonify(companies)
+        logger.info("Successfully fetched companies list")
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching companies: {str(e)}")
@@ -80,6 +386,75 @@ def get_companies():
             "message": str(e)
         }), 500
 
+def get_company_summary(ticker, allow_stale=True):
+    """
+    Per-ticker computed results (name, sector, ratios, health score) shared by
+    /api/company, /api/companies/batch and /api/compare. Pass allow_stale=False
+    when the result goes into another cache entry, which would otherwise carry
+    stale ratios forward as fresh.
+    """
+    with span("company_summary", ticker=ticker):
+        lookup = cache.lookup(
+            f"company_summary_{ticker}", _compute_in_unit_of_work(lambda: analyzer.summarize_company(ticker)),
+            allow_stale=allow_stale
+        )
+        annotate(cache=lookup.status)
+    return lookup
+
+def build_company_payload(ticker, trend_ratio=None, trend_periods=DEFAULT_TREND_PERIODS, industry_avg=None):
+    """Fetch and compute the full /api/company payload for one ticker"""
+    # Get company basic info
+    company_info = scraper.get_company_info(ticker)
+    if not company_info:
+        raise APIError(404, "Company not found", f"No data available for ticker {ticker}")
+    
+    # Get financial ratios and health score from the shared per-ticker layer; the payload is
+    # cached as fresh (also when it is a background refresh), so a stale summary is recomputed
+    summary = get_company_summary(ticker, allow_stale=False).value
+    if not summary:
+        raise APIError(404, "Financial data unavailable", f"Could not calculate ratios for {ticker}")
+    
+    # Get trend data from every statement period already fetched above
+    trends = scraper.get_trend_data(ticker, periods=trend_periods, ratio=trend_ratio)
+    
+    # Get industry averages (batch callers pass one already computed for the sector)
+    if industry_avg is None:
+        industry_avg = analyzer.calculate_industry_average(company_info['sector'])
+    
+    return {
+        "ticker": ticker,
+        "name": company_info['name'],
+        "sector": company_info['sector'],
+        "latest_period": summary['period'] or '2024-Q1',
+        "ratios": summary['ratios'],
+        "trends": trends,
+        "industry_average": industry_avg,
+        "sector_percentiles": analyzer.sector_percentiles(company_info['sector'], summary['ratios']),
+        "health_score": summary['health_score'],
+        "last_updated": datetime.now().isoformat()
+    }
+
+def warm_company(ticker):
+    """Compute a company's default payload and (re)place it in the cache"""
+    with unit_of_work():
+        cache.set(f"company_data_{ticker}", build_company_payload(ticker))
+
+def warm_companies(tickers):
+    """Recompute and cache default payloads for a chunk of tickers; returns how many succeeded"""
+    payloads, errors = build_company_payloads(tickers, refresh=True)
+    for ticker, error in errors.items():
+        logger.warning(f"Prefetch failed for {ticker}: {error['message']}")
+    return len(payloads)
+
+prefetcher = PrefetchScheduler(
+    warm_ticker=warm_company,
+    tickers=lambda: list(scraper.companies),
+    max_workers=PREFETCH_WORKERS,
+    interval=PREFETCH_INTERVAL or None,
+    warm_batch=warm_companies,
+    batch_size=MAX_BATCH_SIZE
+)
+
 @app.route('/api/company/<ticker>')
 def get_company_data(ticker):
     """Get comprehensive financial data for a specific company"""
@@ -93,57 +468,35 @@ def get_company_data(ticker):
                 "message": "Ticker must end with .JK"
             }), 400
         
-        # Check cache first
-        cache_key = f"company_data_{ticker}"
-        cached_data = get_from_cache(cache_key)
-        if cached_data:
-            logger.info(f"Returning cached data for {ticker}")
-            return jsonify(cached_data)
-        
-        # Get company basic info
-        company_info = scraper.get_company_info(ticker)
-        if not company_info:
-            return jsonify({
-                "error": "Company not found",
-                "message": f"No data available for ticker {ticker}"
-            }), 404
+        # Optional trend selection (defaults to the sector's headline ratio over 4 periods)
+        trend_ratio = request.args.get('trend_ratio')
+        trend_periods = request.args.get('trend_periods', DEFAULT_TREND_PERIODS, type=int)
         
-        # Get financial ratios
-        ratios = scraper.calculate_ratios(ticker)
-        if not ratios:
+        if trend_ratio is not None and trend_ratio not in TREND_RATIOS:
             return jsonify({
-                "error": "Financial data unavailable",
-                "message": f"Could not calculate ratios for {ticker}"
-            }), 404
-        
-        # Get trend data (last 4 periods)
-        trends = scraper.get_trend_data(ticker)
-        
-        # Get industry averages
-        industry_avg = analyzer.calculate_industry_average(company_info['sector'])
+                "error": "Invalid trend ratio",
+                "message": f"trend_ratio must be one of: {', '.join(sorted(TREND_RATIOS))}"
+            }), 400
         
-        # Calculate health score
-        health_score = analyzer.calculate_health_score(ratios, company_info['sector'])
-        
-        # Prepare response
-        response_data = {
-            "ticker": ticker,
-            "name": company_info['name'],
-            "sector": company_info['sector'],
-            "latest_period": ratios.get('period', '2024-Q1'),
-            "ratios": ratios['ratios'],
-            "trends": trends,
-            "industry_average": industry_avg,
-            "health_score": health_score,
-            "last_updated": datetime.now().isoformat()
-        }
+        if trend_periods is None or not 1 <= trend_periods <= MAX_TREND_PERIODS:
+            return jsonify({
+                "error": "Invalid trend periods",
+                "message": f"trend_periods must be an integer between 1 and {MAX_TREND_PERIODS}"
+            }), 400
         
-        # Cache the result
-        set_cache(cache_key, response_data)
+        # Check cache first
+        cache_key = f"company_data_{ticker}"
+        if trend_ratio is not None or trend_periods != DEFAULT_TREND_PERIODS:
+            cache_key = f"{cache_key}_{trend_ratio or 'default'}_{trend_periods}"
+        response = cached_json_response(
+            cache_key, lambda: build_company_payload(ticker, trend_ratio, trend_periods)
+        )
         
         logger.info(f"Successfully fetched data for {ticker}")
-        return jsonify(response_data)
+        return response
         
+    except APIError as e:
+        return e.to_response()
     except Exception as e:
         logger.error(f"Error fetching data for {ticker}: {str(e)}")
         return jsonify({
@@ -152,87 +505,346 @@ def get_company_data(ticker):
             "ticker": ticker
         }), 500
 
-@app.route('/api/compare')
-def compare_companies():
-    """Compare financial data between two companies"""
+def parse_ticker_list(raw):
+    """Split a comma-separated (or already listed) set of tickers, dropping blanks and duplicates"""
+    if isinstance(raw, str):
+        raw = raw.split(',')
+    tickers = []
+    for ticker in raw or []:
+        ticker = str(ticker).strip().upper()
+        if ticker and ticker not in tickers:
+            tickers.append(ticker)
+    return tickers
+
+def build_company_payloads(tickers, refresh=False):
+    """
+    Build default /api/company payloads for many tickers in one round of work:
+    statements load in parallel, ratios and health scores come from one
+    vectorized pass and each sector's industry average is computed once for
+    the whole batch. With refresh, cached payloads are recomputed.
+    """
+    payloads = {}
+    errors = {}
+    missing = []
+    
+    for ticker in tickers:
+        cached = None if refresh else cache.get(f"company_data_{ticker}")
+        if cached is not None:
+            payloads[ticker] = cached
+        elif not scraper.get_company_info(ticker):
+            errors[ticker] = {"error": "Company not found", "message": f"No data available for ticker {ticker}"}
+        else:
+            missing.append(ticker)
+    
+    if missing:
+        with unit_of_work():
+            analyzer.prefetch_financial_data(missing)
+            
+            # Seed the shared per-ticker layer so build_company_payload finds every summary
+            for ticker, summary in analyzer.summarize_companies(missing).items():
+                if summary:
+                    cache.set(f"company_summary_{ticker}", summary)
+            
+            sectors = {scraper.get_company_info(ticker)['sector'] for ticker in missing}
+            sector_averages = {sector: analyzer.calculate_industry_average(sector) for sector in sectors}
+            
+            for ticker in missing:
+                try:
+                    sector = scraper.get_company_info(ticker)['sector']
+                    payload = build_company_payload(ticker, industry_avg=sector_averages[sector])
+                    cache.set(f"company_data_{ticker}", payload)
+                    payloads[ticker] = payload
+                except APIError as e:
+                    errors[ticker] = {"error": e.error, "message": e.message}
+    
+    return payloads, errors
+
+@app.route('/api/companies/batch', methods=['GET', 'POST'])
+def get_companies_batch():
+    """Get full company payloads for many tickers in one call"""
     try:
-        ticker1 = request.args.get('ticker1')
-        ticker2 = request.args.get('ticker2')
-        
-        if not ticker1 or not ticker2:
+        if request.method == 'POST':
+            body = request.get_json(silent=True)
+            if isinstance(body, list):
+                body = {'tickers': body}
+            elif body is not None and not isinstance(body, dict):
+                return jsonify({
+                    "error": "Invalid body",
+                    "message": "The JSON body must be {\"tickers\": [...]} or a list of tickers"
+                }), 400
+            tickers = parse_ticker_list((body or {}).get('tickers'))
+        else:
+            tickers = parse_ticker_list(request.args.get('tickers', ''))
+        
+        if not tickers:
             return jsonify({
                 "error": "Missing parameters",
-                "message": "Both ticker1 and ticker2 are required"
+                "message": "Provide tickers as ?tickers=A.JK,B.JK or a JSON body {\"tickers\": [...]}"
             }), 400
         
-        if ticker1 == ticker2:
+        if len(tickers) > MAX_BATCH_SIZE:
             return jsonify({
-                "error": "Invalid comparison",
-                "message": "Cannot compare company with itself"
+                "error": "Too many tickers",
+                "message": f"At most {MAX_BATCH_SIZE} tickers can be requested at once"
             }), 400
         
-        logger.info(f"Comparing companies: {ticker1} vs {ticker2}")
+        invalid = [ticker for ticker in tickers if not ticker.endswith('.JK')]
+        if invalid:
+            return jsonify({
+                "error": "Invalid ticker format",
+                "message": f"Ticker must end with .JK: {', '.join(invalid)}"
+            }), 400
         
-        # Check cache first
-        cache_key = f"comparison_{min(ticker1, ticker2)}_{max(ticker1, ticker2)}"
-        cached_data = get_from_cache(cache_key)
-        if cached_data:
-            logger.info(f"Returning cached comparison for {ticker1} vs {ticker2}")
-            return jsonify(cached_data)
+        logger.info(f"Fetching batch data for {len(tickers)} companies")
+        
+        payloads, errors = build_company_payloads(tickers)
         
-        # Get data for both companies
-        company1_info = scraper.get_company_info(ticker1)
-        company2_info = scraper.get_company_info(ticker2)
+        logger.info(f"Successfully fetched batch data for {len(payloads)} of {len(tickers)} companies")
+        return json_response({
+            "companies": {ticker: payloads[ticker] for ticker in tickers if ticker in payloads},
+            "errors": errors,
+            "last_updated": datetime.now().isoformat()
+        })
         
-        if not company1_info or not company2_info:
+    except Exception as e:
+        logger.error(f"Error fetching batch company data: {str(e)}")
+        return jsonify({
+            "error": "Failed to fetch company data",
+            "message": str(e)
+        }), 500
+
+def build_comparison_payload(tickers):
+    """
+    Assemble an N-way comparison from per-ticker summaries; combinations are
+    never cached themselves, so the cache grows with tickers, not with pairs
+    """
+    unknown = [ticker for ticker in tickers if not scraper.get_company_info(ticker)]
+    if unknown:
+        raise APIError(404, "Company not found", f"Companies not found: {', '.join(unknown)}")
+    
+    # Load statements for uncached companies concurrently before summarizing them
+    uncached = [ticker for ticker in tickers if cache.get(f"company_summary_{ticker}") is None]
+    if len(uncached) > 1:
+        analyzer.prefetch_financial_data(uncached)
+    
+    lookups = {ticker: get_company_summary(ticker) for ticker in tickers}
+    unavailable = [ticker for ticker, lookup in lookups.items() if not lookup.value]
+    if unavailable:
+        raise APIError(404, "Financial data unavailable", f"Could not get ratios for: {', '.join(unavailable)}")
+    
+    comparison_data = {}
+    for ticker, lookup in lookups.items():
+        summary = lookup.value
+        comparison_data[ticker] = {
+            "name": summary['name'],
+            "sector": summary['sector'],
+            "ratios": summary['ratios'],
+            "health_score": summary['health_score']
+        }
+    
+    return {
+        "comparison_data": comparison_data,
+        "last_updated": datetime.now().isoformat()
+    }, lookups
+
+@app.route('/api/compare')
+def compare_companies():
+    """Compare financial data between two or more companies (?tickers=A,B,C or ?ticker1=A&ticker2=B)"""
+    try:
+        if request.args.get('tickers'):
+            requested = request.args.get('tickers').split(',')
+        else:
+            ticker1 = request.args.get('ticker1')
+            ticker2 = request.args.get('ticker2')
+            
+            if not ticker1 or not ticker2:
+                return jsonify({
+                    "error": "Missing parameters",
+                    "message": "Provide tickers=A.JK,B.JK or both ticker1 and ticker2"
+                }), 400
+            requested = [ticker1, ticker2]
+        
+        tickers = parse_ticker_list(requested)
+        
+        if len(tickers) < 2:
             return jsonify({
-                "error": "Company not found",
-                "message": "One or both companies not found"
-            }), 404
+                "error": "Invalid comparison",
+                "message": "Cannot compare company with itself; at least two different companies are required"
+            }), 400
         
-        # Get ratios for both companies
-        ratios1 = scraper.calculate_ratios(ticker1)
-        ratios2 = scraper.calculate_ratios(ticker2)
+        if len(tickers) > MAX_COMPARE_SIZE:
+            return jsonify({
+                "error": "Too many tickers",
+                "message": f"At most {MAX_COMPARE_SIZE} companies can be compared at once"
+            }), 400
         
-        if not ratios1 or not ratios2:
+        logger.info(f"Comparing companies: {' vs '.join(tickers)}")
+        
+        with unit_of_work():
+            response_data, lookups = build_comparison_payload(tickers)
+        
+        # The comparison is validated by the summaries it is built from; it is
+        # only weakly equal across requests because of its timestamp
+        etag = combine_etags(f"{ticker}:{lookup.encoded.etag}" for ticker, lookup in lookups.items())
+        statuses = {lookup.status for lookup in lookups.values()}
+        response = conditional_json_response(
+            etag,
+            lambda: EncodedBody(dumps(response_data), None, None),
+            min(cache.ttl_for(f"company_summary_{ticker}") for ticker in tickers),
+            max(lookup.age for lookup in lookups.values()),
+            'HIT' if statuses == {'hit'} else ('MISS' if 'miss' in statuses else 'STALE'),
+            weak=True
+        )
+        
+        logger.info(f"Successfully compared {' vs '.join(tickers)}")
+        return response
+        
+    except APIError as e:
+        return e.to_response()
+    except Exception as e:
+        logger.error(f"Error comparing companies: {str(e)}")
+        return jsonify({
+            "error": "Failed to compare companies",
+            "message": str(e)
+        }), 500
+
+# Companies the screener failed to index: ticker -> (retry at, current backoff in seconds)
+screener_backoff = {}
+screener_coverage_lock = threading.Lock()
+screener_filling = False
+
+def fill_screener_coverage(missing):
+    """Index companies in one batch pass, backing off on those that still could not be indexed"""
+    global screener_filling
+    try:
+        with unit_of_work():
+            analyzer.prefetch_financial_data(missing)
+            scraper.calculate_ratios_batch(missing)
+    except Exception as e:
+        logger.error(f"Error filling screener coverage: {str(e)}")
+    finally:
+        now = time.time()
+        with screener_coverage_lock:
+            for ticker in missing:
+                if ticker in analyzer.screener:
+                    screener_backoff.pop(ticker, None)
+                    continue
+                previous = screener_backoff.get(ticker)
+                delay = SCREEN_RETRY_INTERVAL if previous is None else min(previous[1] * 2, SCREEN_RETRY_MAX_INTERVAL)
+                screener_backoff[ticker] = (now + delay, delay)
+            for ticker in [ticker for ticker in screener_backoff if ticker not in scraper.companies]:
+                del screener_backoff[ticker]
+            screener_filling = False
+
+def ensure_screener_coverage():
+    """
+    Start indexing companies the screener has not seen yet on a background
+    thread and return how much of the universe is indexed. Requests never
+    wait on upstream fetches; they screen whatever is indexed so far.
+    """
+    global screener_filling
+    companies = scraper.companies
+    now = time.time()
+    with screener_coverage_lock:
+        missing = [
+            ticker for ticker in companies
+            if ticker not in analyzer.screener and screener_backoff.get(ticker, (0, 0))[0] <= now
+        ]
+        if missing and not screener_filling:
+            screener_filling = True
+            threading.Thread(
+                target=fill_screener_coverage, args=(missing,), name="screener-coverage", daemon=True
+            ).start()
+        filling = screener_filling
+    
+    return {
+        "indexed": sum(1 for ticker in companies if ticker in analyzer.screener),
+        "companies": len(companies),
+        "filling": filling
+    }
+
+@app.route('/api/screen')
+def screen_companies():
+    """
+    Screen companies by ratio ranges, e.g.
+    /api/screen?type=non_banking&roe_min=15&der_max=0.7&sort=health_score&order=desc
+    """
+    try:
+        fields = TREND_RATIOS | {'health_score'}
+        
+        ranges = {}
+        malformed = []
+        for field in fields:
+            bounds = []
+            for name in (f'{field}_min', f'{field}_max'):
+                raw = request.args.get(name)
+                try:
+                    value = None if raw is None else float(raw)
+                except ValueError:
+                    value = math.nan
+                if value is not None and not math.isfinite(value):
+                    malformed.append(name)
+                bounds.append(value)
+            if bounds != [None, None]:
+                ranges[field] = tuple(bounds)
+        
+        if malformed:
             return jsonify({
-                "error": "Financial data unavailable",
-                "message": "Could not get ratios for one or both companies"
-            }), 404
+                "error": "Invalid range",
+                "message": f"Range bounds must be finite numbers: {', '.join(sorted(malformed))}"
+            }), 400
         
-        # Calculate health scores
-        health_score1 = analyzer.calculate_health_score(ratios1, company1_info['sector'])
-        health_score2 = analyzer.calculate_health_score(ratios2, company2_info['sector'])
-        
-        # Prepare comparison response
-        response_data = {
-            "comparison_data": {
-                ticker1: {
-                    "name": company1_info['name'],
-                    "sector": company1_info['sector'],
-                    "ratios": ratios1['ratios'],
-                    "health_score": health_score1
-                },
-                ticker2: {
-                    "name": company2_info['name'],
-                    "sector": company2_info['sector'],
-                    "ratios": ratios2['ratios'],
-                    "health_score": health_score2
-                }
-            },
-            "last_updated": datetime.now().isoformat()
-        }
+        sort_by = request.args.get('sort', 'health_score')
+        order = request.args.get('order', 'desc')
+        company_type = request.args.get('type')
+        limit = request.args.get('limit', DEFAULT_SCREEN_LIMIT, type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        if sort_by not in fields:
+            return jsonify({
+                "error": "Invalid sort field",
+                "message": f"sort must be one of: {', '.join(sorted(fields))}"
+            }), 400
+        
+        if order not in ('asc', 'desc') or company_type not in (None, 'banking', 'non_banking'):
+            return jsonify({
+                "error": "Invalid parameters",
+                "message": "order must be asc or desc and type must be banking or non_banking"
+            }), 400
         
-        # Cache the result
-        set_cache(cache_key, response_data)
+        if limit is None or not 1 <= limit <= MAX_SCREEN_LIMIT or offset is None or offset < 0:
+            return jsonify({
+                "error": "Invalid paging",
+                "message": f"limit must be between 1 and {MAX_SCREEN_LIMIT} and offset must not be negative"
+            }), 400
         
-        logger.info(f"Successfully compared {ticker1} vs {ticker2}")
-        return jsonify(response_data)
+        coverage = ensure_screener_coverage()
+        
+        result = analyzer.screener.screen(
+            ranges=ranges,
+            sector=request.args.get('sector'),
+            banking=None if company_type is None else company_type == 'banking',
+            sort_by=sort_by,
+            descending=order == 'desc',
+            limit=limit,
+            offset=offset
+        )
+        
+        for row in result['results']:
+            row['name'] = scraper.companies.get(row['ticker'], {}).get('name')
+        
+        return json_response({
+            **result,
+            "limit": limit,
+            "offset": offset,
+            "coverage": coverage,
+            "last_updated": datetime.now().isoformat()
+        })
         
     except Exception as e:
-        logger.error(f"Error comparing companies: {str(e)}")
+        logger.error(f"Error screening companies: {str(e)}")
         return jsonify({
-            "error": "Failed to compare companies",
+            "error": "Failed to screen companies",
             "message": str(e)
         }), 500
 
@@ -242,19 +854,10 @@ def get_sectors():
     try:
         logger.info("Fetching sectors data")
         
-        # Check cache first
-        cached_data = get_from_cache('sectors_data')
-        if cached_data:
-            logger.info("Returning cached sectors data")
-            return jsonify(cached_data)
-        
-        sectors = scraper.get_sectors_summary()
-        
-        # Cache the result
-        set_cache('sectors_data', sectors)
+        response = cached_json_response('sectors_data', scraper.get_sectors_summary)
         
-        logger.info(f"Successfully fetched data for {len(sectors)} sectors")
-        return jsonify(sectors)
+        logger.info("Successfully fetched sectors data")
+        return response
         
     except Exception as e:
         logger.error(f"Error fetching sectors: {str(e)}")
@@ -263,6 +866,32 @@ def get_sectors():
             "message": str(e)
         }), 500
 
+@app.route('/api/sectors/<path:sector>/stats')
+def get_sector_stats(sector):
+    """Get median, quartiles, min/max and standard deviation of every ratio in a sector"""
+    try:
+        logger.info(f"Fetching statistics for sector: {sector}")
+        
+        if sector not in scraper.get_sectors_summary():
+            return jsonify({
+                "error": "Sector not found",
+                "message": f"No companies are listed in sector {sector}"
+            }), 404
+        
+        stats = analyzer.sector_distribution(sector)
+        
+        return jsonify({
+            **stats,
+            "last_updated": datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching statistics for {sector}: {str(e)}")
+        return jsonify({
+            "error": "Failed to fetch sector statistics",
+            "message": str(e)
+        }), 500
+
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
@@ -279,6 +908,14 @@ def internal_error(error):
         "message": "An unexpected error occurred"
     }), 500
 
+# Started once every handler it warms through is defined
+if WARMUP_ENABLED or PREFETCH_INTERVAL:
+    prefetcher.start()
+
 if __name__ == '__main__':
     logger.info("Starting FinDash Indonesia API server...")
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(
+        debug=os.environ.get('FINDASH_DEBUG', '1') == '1',
+        host=os.environ.get('FINDASH_HOST', '0.0.0.0'),
+        port=int(os.environ.get('FINDASH_PORT', '5000'))
+    )
\ No newline at end of file
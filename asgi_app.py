@@ -0,0 +1,214 @@
+"""
+FinDash Indonesia ASGI Entry Point
+Serves the routes of app.py from an asyncio event loop, e.g.
+
+    uvicorn asgi_app:application --workers 1
+
+Before a request reaches its Flask handler, every statement the handler will
+need is fetched as an awaitable task on a dedicated fetch pool. Concurrent
+requests share in-flight fetches, so slow upstream calls tie up fetch threads
+rather than request workers, and the handler itself only computes.
+"""
+
+import asyncio
+import io
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from werkzeug.exceptions import HTTPException
+
+from app import app as flask_app, analyzer, cache, parse_ticker_list, scraper, PEER_FETCH_TIMEOUT
+from cache_manager import AsyncSingleFlight
+from unit_of_work import begin_unit_of_work, end_unit_of_work
+
+logger = logging.getLogger(__name__)
+
+# Threads available to blocking statement downloads (independent of request concurrency)
+FETCH_WORKERS = int(os.environ.get('FINDASH_ASGI_FETCH_WORKERS', '32'))
+
+_fetch_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="asgi-fetch")
+_statement_flights = AsyncSingleFlight()
+
+
+async def fetch_statements(ticker: str) -> Optional[Dict[str, Any]]:
+    """Load one ticker's statements off the event loop, sharing any fetch already in flight"""
+    # Executor threads run outside any unit of work, so nothing is memoized here
+    loop = asyncio.get_running_loop()
+    return await _statement_flights.do(
+        ticker, lambda: loop.run_in_executor(_fetch_executor, scraper.get_financial_data, ticker)
+    )
+
+
+def _missing_peers(tickers: List[str]) -> List[str]:
+    """Sector peers of the given tickers that the sector index has never seen"""
+    sectors = {info['sector'] for info in map(scraper.get_company_info, tickers) if info}
+    return [
+        ticker
+        for sector in sectors
+        for ticker in analyzer.sector_companies(sector)
+        if ticker not in analyzer.sector_index
+    ]
+
+
+def tickers_to_preload(endpoint: str, view_args: Dict[str, Any], query: Dict[str, List[str]],
+                       body: bytes) -> List[str]:
+    """Tickers whose statements the Flask handler for endpoint would otherwise fetch itself"""
+    if endpoint == 'get_company_data':
+        ticker = view_args['ticker']
+        if f"company_data_{ticker}" in cache:
+            return []
+        return [ticker] + _missing_peers([ticker])
+
+    if endpoint == 'get_companies_batch':
+        if body:
+            try:
+                raw = json.loads(body).get('tickers')
+            except (ValueError, AttributeError):
+                raw = None
+        else:
+            raw = query.get('tickers', [''])[0]
+        tickers = [ticker for ticker in parse_ticker_list(raw) if f"company_data_{ticker}" not in cache]
+        return tickers + _missing_peers(tickers)
+
+    if endpoint == 'compare_companies':
+        if 'tickers' in query:
+            raw = query['tickers'][0]
+        else:
+            raw = query.get('ticker1', []) + query.get('ticker2', [])
+        return [ticker for ticker in parse_ticker_list(raw) if f"company_summary_{ticker}" not in cache]
+
+    if endpoint == 'screen_companies':
+        return [ticker for ticker in scraper.companies if ticker not in analyzer.screener]
+
+    if endpoint == 'get_sector_stats':
+        return [ticker for ticker in analyzer.sector_companies(view_args['sector'])
+                if ticker not in analyzer.sector_index]
+
+    return []
+
+
+async def preload(uow, tickers: List[str]) -> None:
+    """Fetch tickers concurrently and seed the request's unit of work with the results"""
+    tickers = [ticker for ticker in dict.fromkeys(tickers) if scraper.get_company_info(ticker)]
+    if not tickers:
+        return
+
+    tasks = {ticker: asyncio.ensure_future(fetch_statements(ticker)) for ticker in tickers}
+    done, pending = await asyncio.wait(tasks.values(), timeout=PEER_FETCH_TIMEOUT)
+    if pending:
+        # The handler fetches stragglers itself, joining the fetch still in flight
+        logger.warning(f"Preload timed out for {len(pending)} of {len(tickers)} companies")
+
+    for ticker, task in tasks.items():
+        if task in done and task.exception() is None:
+            uow.memoize("statements", ticker, lambda result=task.result(): result)
+
+
+def _wsgi_environ(scope: Dict[str, Any], body: bytes) -> Dict[str, Any]:
+    """Translate an ASGI HTTP scope into a WSGI environ for the Flask app"""
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False
+    }
+
+    for name, value in scope.get('headers', []):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = f"HTTP_{name}"
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def _call_wsgi(environ: Dict[str, Any]) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """Run the Flask app on a worker thread and collect its complete response"""
+    response: Dict[str, Any] = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = int(status.split(' ', 1)[0])
+        response['headers'] = [(name.encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        return lambda data: None
+
+    result = flask_app(environ, start_response)
+    try:
+        body = b''.join(result)
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return response['status'], response['headers'], body
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            break
+    return b''.join(chunks)
+
+
+async def _lifespan(receive, send) -> None:
+    # Startup work (sector index rebuild, optional warm-up) already ran when app.py was imported
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _fetch_executor.shutdown(wait=False)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send) -> None:
+    """ASGI 3 application exposing the same routes and JSON responses as app.py"""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    body = await _read_body(receive)
+
+    uow, token = begin_unit_of_work()
+    try:
+        try:
+            endpoint, view_args = flask_app.url_map.bind('').match(scope['path'], method=scope['method'])
+            query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+            await preload(uow, tickers_to_preload(endpoint, view_args, query, body))
+        except HTTPException:
+            pass  # Flask answers unknown routes and methods itself
+        except Exception as e:
+            logger.warning(f"Preload failed for {scope['path']}: {str(e)}")
+
+        # to_thread copies this context, so the handler joins the preloaded unit of work
+        status, headers, response_body = await asyncio.to_thread(_call_wsgi, _wsgi_environ(scope, body))
+    finally:
+        end_unit_of_work(token)
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': response_body})
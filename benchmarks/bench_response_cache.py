@@ -0,0 +1,98 @@
+"""
+Response Cache Benchmark
+Per-hit CPU cost of re-serializing a cached payload with jsonify versus
+sending bytes that were serialized (and compressed) once when cached.
+
+Run from the repository root:
+    python benchmarks/bench_response_cache.py --iterations 5000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify  # noqa: E402
+from werkzeug.datastructures import Accept  # noqa: E402
+
+from ratio_engine import NON_BANKING_RATIOS  # noqa: E402
+from response_encoding import encode_body, orjson, brotli  # noqa: E402
+
+
+def synthetic_company_payload(trend_periods: int, seed: int = 7) -> dict:
+    """A non-banking /api/company payload with realistic shape and number formatting"""
+    rng = random.Random(seed)
+    ratios = {name: rng.uniform(-5, 60) for name in NON_BANKING_RATIOS}
+    periods = [f"{2024 - i // 4}-Q{4 - i % 4}" for i in range(trend_periods)][::-1]
+    return {
+        "ticker": "UNVR.JK",
+        "name": "Unilever Indonesia Tbk",
+        "sector": "Consumer Goods",
+        "latest_period": periods[-1],
+        "ratios": ratios,
+        "trends": [{"period": period, "value": round(rng.uniform(0.5, 3), 2)} for period in periods],
+        "industry_average": {
+            **{name: rng.uniform(-5, 60) for name in NON_BANKING_RATIOS},
+            "sector": "Consumer Goods",
+            "successful_calculations": 12,
+            "total_companies_in_sector": 14
+        },
+        "sector_percentiles": {name: round(rng.uniform(0, 100), 1) for name in NON_BANKING_RATIOS},
+        "health_score": 72,
+        "last_updated": "2024-05-01T10:00:00.000000"
+    }
+
+
+def cpu_per_call(fn, iterations: int) -> float:
+    """Mean CPU microseconds per call"""
+    fn()
+    started = time.process_time()
+    for _ in range(iterations):
+        fn()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=5000)
+    parser.add_argument("--trend-periods", type=int, default=20)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    payload = synthetic_company_payload(args.trend_periods)
+
+    with app.test_request_context():
+        encode_cost = cpu_per_call(lambda: encode_body(payload), max(1, args.iterations // 10))
+        encoded = encode_body(payload)
+
+        def jsonify_hit():
+            return jsonify(payload).get_data()
+
+        def encoded_hit(accepted):
+            def hit():
+                encoding, body = encoded.select(accepted)
+                return app.response_class(body, mimetype="application/json").get_data()
+            return hit
+
+        results = [
+            ("jsonify per hit", cpu_per_call(jsonify_hit, args.iterations), len(jsonify(payload).get_data())),
+            ("cached bytes, identity", cpu_per_call(encoded_hit(Accept()), args.iterations), len(encoded.identity)),
+            ("cached bytes, gzip", cpu_per_call(encoded_hit(Accept([("gzip", 1)])), args.iterations),
+             len(encoded.gzip or encoded.identity)),
+        ]
+        if encoded.br is not None:
+            results.append(("cached bytes, br", cpu_per_call(encoded_hit(Accept([("br", 1)])), args.iterations),
+                            len(encoded.br)))
+
+    print(f"encoder: {'orjson' if orjson is not None else 'json'}, brotli: {'yes' if brotli is not None else 'no'}")
+    print(f"one-time encode (JSON + compressed variants): {encode_cost:.1f} us")
+    baseline = results[0][1]
+    for label, cost, size in results:
+        print(f"{label:<24} {cost:8.1f} us/hit  {size:7d} bytes  {baseline / cost:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+"""
+Benchmark Suite
+Ratio calculators, industry averages, health scores and the Flask endpoints
+over synthetic universes of 20 to 2,000 companies, with no network access.
+
+Run from the repository root:
+    python benchmarks/bench_suite.py --sizes 20,200,2000 --output results.json
+    python benchmarks/bench_suite.py --latency 0.05 --baseline results.json
+
+Each case reports throughput, p50/p99 latency and (unless --no-memory) the
+peak Python heap allocation measured with tracemalloc in a separate pass, so
+memory tracing does not distort the timings. The run ends by comparing the
+memory the columnar store retains for --layout-size companies with the
+per-company Series and dict layout it replaced.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# The Flask app reads its configuration at import time
+os.environ.update({
+    "FINDASH_PROVIDER": "synthetic",
+    "FINDASH_STATEMENT_STORE": "",
+    "FINDASH_SHARED_CACHE": "",
+    "FINDASH_WARMUP": "0",
+    "FINDASH_PREFETCH_INTERVAL": "0"
+})
+
+from columnar_store import ColumnarStore  # noqa: E402
+from statement_providers import SyntheticProvider  # noqa: E402
+from synthetic import build_engine, build_universe  # noqa: E402
+from unit_of_work import unit_of_work  # noqa: E402
+
+# A case prepares fresh state and returns the operations to time, plus how
+# many companies each operation processes (for throughput)
+Case = Callable[[], Tuple[List[Callable[[], Any]], int]]
+
+
+@contextmanager
+def seeded_unit_of_work(statements: Dict[str, Any]) -> Iterator[None]:
+    """A unit of work whose statement lookups are already answered, so only computation is timed"""
+    with unit_of_work() as uow:
+        for ticker, data in statements.items():
+            uow.memoize("statements", ticker, lambda data=data: data)
+        yield
+
+
+def load_statements(scraper, tickers: List[str]) -> Dict[str, Any]:
+    return {ticker: scraper.get_financial_data(ticker) for ticker in tickers}
+
+
+def analysis_cases(size: int, args: argparse.Namespace) -> Dict[str, Case]:
+    """Cases that drive BEIDataScraper and AnalysisEngine directly"""
+    scraper, analyzer = build_engine(size, latency=args.latency, seed=args.seed)
+    tickers = list(scraper.companies)
+    sectors = sorted({info["sector"] for info in scraper.companies.values()})
+    statements = load_statements(scraper, tickers)
+
+    def statement_fetch():
+        return [lambda ticker=ticker: scraper.get_financial_data(ticker) for ticker in tickers], 1
+
+    def statement_fetch_concurrent():
+        return [lambda: analyzer.prefetch_financial_data(tickers)], len(tickers)
+
+    def ratios_scalar():
+        def calculate(ticker):
+            with seeded_unit_of_work({ticker: statements[ticker]}):
+                scraper.calculate_ratios(ticker)
+        return [lambda ticker=ticker: calculate(ticker) for ticker in tickers], 1
+
+    def ratios_batch():
+        def calculate():
+            with seeded_unit_of_work(statements):
+                scraper.calculate_ratios_batch(tickers)
+        return [calculate for _ in range(args.repeat)], len(tickers)
+
+    def industry_average_cold():
+        def calculate(sector):
+            analyzer.sector_index.clear()
+            with seeded_unit_of_work(statements):
+                analyzer.calculate_industry_average(sector)
+        return [lambda sector=sector: calculate(sector) for sector in sectors], size / len(sectors)
+
+    def industry_average_warm():
+        with seeded_unit_of_work(statements):
+            scraper.calculate_ratios_batch(tickers)
+        return [lambda sector=sector: analyzer.calculate_industry_average(sector) for sector in sectors], 1
+
+    with seeded_unit_of_work(statements):
+        ratios = {ticker: data["ratios"] for ticker, data in scraper.calculate_ratios_batch(tickers).items() if data}
+    ticker_sectors = {ticker: scraper.companies[ticker]["sector"] for ticker in ratios}
+
+    def health_score_scalar():
+        return [
+            lambda ticker=ticker: analyzer.calculate_health_score({"ratios": ratios[ticker]}, ticker_sectors[ticker])
+            for ticker in ratios
+        ], 1
+
+    def health_score_batch():
+        return [lambda: analyzer.calculate_health_scores_batch(ratios, ticker_sectors)
+                for _ in range(args.repeat)], len(ratios)
+
+    return {
+        "statement_fetch": statement_fetch,
+        "statement_fetch_concurrent": statement_fetch_concurrent,
+        "ratios_scalar": ratios_scalar,
+        "ratios_batch": ratios_batch,
+        "industry_average_cold": industry_average_cold,
+        "industry_average_warm": industry_average_warm,
+        "health_score_scalar": health_score_scalar,
+        "health_score_batch": health_score_batch
+    }
+
+
+def endpoint_cases(size: int, args: argparse.Namespace) -> Dict[str, Case]:
+    """Cases that go through the Flask app and its response cache"""
+    import app as api
+
+    api.scraper, api.analyzer = build_engine(size, latency=args.latency, seed=args.seed)
+    api.cache.clear()
+    client = api.app.test_client()
+
+    rng = random.Random(args.seed)
+    tickers = list(api.scraper.companies)
+    sample = rng.sample(tickers, min(args.samples, len(tickers)))
+
+    def get(url: str) -> Callable[[], Any]:
+        def request():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} answered {response.status_code}")
+        return request
+
+    def company_cold():
+        def request(ticker):
+            api.cache.clear()
+            api.analyzer.sector_index.clear()
+            get(f"/api/company/{ticker}")()
+        return [lambda ticker=ticker: request(ticker) for ticker in sample], 1
+
+    def company_warm():
+        for ticker in sample:
+            get(f"/api/company/{ticker}")()
+        return [get(f"/api/company/{ticker}") for ticker in sample], 1
+
+    def compare():
+        api.cache.clear()
+        groups = [rng.sample(tickers, min(3, len(tickers))) for _ in sample]
+        return [get(f"/api/compare?tickers={','.join(group)}") for group in groups], 3
+
+    def screen():
+        # /api/screen indexes missing companies in the background; index them up front instead
+        api.fill_screener_coverage([ticker for ticker in tickers if ticker not in api.analyzer.screener])
+        return [get(f"/api/screen?roe_min={rng.uniform(0, 20):.1f}&limit=50") for _ in sample], size
+
+    def companies_batch():
+        api.cache.clear()
+        chunks = [tickers[start:start + 20] for start in range(0, len(tickers), 20)][:len(sample)]
+        return [get(f"/api/companies/batch?tickers={','.join(chunk)}") for chunk in chunks], 20
+
+    return {
+        "endpoint_company_cold": company_cold,
+        "endpoint_company_warm": company_warm,
+        "endpoint_compare": compare,
+        "endpoint_screen": screen,
+        "endpoint_companies_batch": companies_batch
+    }
+
+
+def run_case(case: Case) -> Dict[str, Any]:
+    """Time every operation of a freshly prepared case"""
+    operations, units = case()
+    latencies = []
+    started = time.perf_counter()
+    for operation in operations:
+        operation_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - operation_started)
+    elapsed = time.perf_counter() - started
+
+    latencies_ms = np.array(latencies) * 1000
+    return {
+        "calls": len(operations),
+        "companies_per_call": units,
+        "throughput_per_s": round(len(operations) * units / elapsed, 2) if elapsed > 0 else None,
+        "p50_ms": round(float(np.percentile(latencies_ms, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies_ms, 99)), 4),
+        "mean_ms": round(float(latencies_ms.mean()), 4),
+        "max_ms": round(float(latencies_ms.max()), 4)
+    }
+
+
+def peak_memory(case: Case) -> int:
+    """Peak traced heap allocation while a freshly prepared case runs"""
+    operations, _ = case()
+    tracemalloc.start()
+    try:
+        for operation in operations:
+            operation()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def retained_memory(build: Callable[[], Any]) -> int:
+    """Bytes still allocated by build() once it returns, while its result is kept alive"""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        kept = build()
+        gc.collect()
+        retained = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del kept
+    return retained
+
+
+def layout_memory(size: int, seed: int, copies: int = 2) -> Dict[str, Any]:
+    """
+    Memory held for the latest line items and ratios of a universe: the
+    previous layout (a pandas Series per latest statement, and a dict of
+    Python floats per company in each of `copies` cached payloads) against
+    the columnar store (shared float64 columns, one view per payload)
+    """
+    scraper, _ = build_engine(size, seed=seed)
+    provider = SyntheticProvider(seed=seed)
+    universe = build_universe(size, seed)
+    frames = {ticker: provider.fetch_statements(ticker) for ticker in universe}
+    ratios = {}
+    for ticker, statements in frames.items():
+        bs, income = statements["balance_sheet"].iloc[:, 0], statements["income_statement"].iloc[:, 0]
+        banking = universe[ticker]["sector"] == "Banking"
+        ratios[ticker] = (banking, scraper._calculate_banking_ratios(bs, income) if banking
+                          else scraper._calculate_non_banking_ratios(bs, income))
+
+    def dict_layout():
+        return {
+            ticker: {
+                "balance_sheet": statements["balance_sheet"].iloc[:, 0],
+                "income_statement": statements["income_statement"].iloc[:, 0],
+                "cash_flow": statements["cash_flow"].iloc[:, 0],
+                "ratios": [{name: float(value) for name, value in ratios[ticker][1].items()} for _ in range(copies)]
+            }
+            for ticker, statements in frames.items()
+        }
+
+    def columnar_layout():
+        store = ColumnarStore()
+        views = {}
+        for ticker, statements in frames.items():
+            period = str(statements["balance_sheet"].columns[0])
+            line_items = store.put_line_items(
+                ticker, statements["balance_sheet"].iloc[:, 0], statements["income_statement"].iloc[:, 0], period
+            )
+            banking, values = ratios[ticker]
+            views[ticker] = (line_items, [store.put_ratios(ticker, banking, values) for _ in range(copies)])
+        return store, views
+
+    dict_bytes = retained_memory(dict_layout)
+    columnar_bytes = retained_memory(columnar_layout)
+    return {
+        "companies": size,
+        "payload_copies": copies,
+        "dict_layout_bytes": dict_bytes,
+        "columnar_bytes": columnar_bytes,
+        "reduction": round(dict_bytes / columnar_bytes, 2) if columnar_bytes else None
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare_to_baseline(results: List[Dict[str, Any]], baseline_path: str) -> None:
+    """Print p50 and throughput changes against an earlier results file"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(row["benchmark"], row["companies"]): row for row in json.load(f)["results"]}
+
+    print(f"\nChange against {baseline_path} (negative p50 / positive throughput is better)")
+    for row in results:
+        previous = baseline.get((row["benchmark"], row["companies"]))
+        if not previous:
+            continue
+        p50_change = (row["p50_ms"] / previous["p50_ms"] - 1) * 100 if previous["p50_ms"] else 0.0
+        throughput_change = ((row["throughput_per_s"] or 0) / previous["throughput_per_s"] - 1) * 100 \
+            if previous.get("throughput_per_s") else 0.0
+        print(f"{row['benchmark']:<30} {row['companies']:>6}  p50 {p50_change:+7.1f}%  "
+              f"throughput {throughput_change:+7.1f}%")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="20,200,2000", help="comma-separated universe sizes")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated upstream latency in seconds")
+    parser.add_argument("--samples", type=int, default=25, help="requests per endpoint case")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions of whole-universe batch cases")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", help="comma-separated benchmark names to run")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--layout-size", type=int, default=900,
+                        help="universe size for the columnar vs dict memory comparison (0 skips it)")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--baseline", help="earlier --output file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="keep INFO and WARNING logging")
+    args = parser.parse_args()
+
+    if not args.verbose:
+        logging.disable(logging.WARNING)
+
+    only = set(args.only.split(",")) if args.only else None
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        for build in (analysis_cases, endpoint_cases):
+            cases = build(size, args)
+            for name, case in cases.items():
+                if only and name not in only:
+                    continue
+                row = {"benchmark": name, "companies": size, **run_case(case)}
+                if not args.no_memory:
+                    row["peak_memory_bytes"] = peak_memory(case)
+                results.append(row)
+                memory = f"{row['peak_memory_bytes'] / 1e6:8.1f} MB" if "peak_memory_bytes" in row else ""
+                print(f"{name:<30} {size:>6}  {row['throughput_per_s']:>12} /s  "
+                      f"p50 {row['p50_ms']:>10.3f} ms  p99 {row['p99_ms']:>10.3f} ms  {memory}")
+
+    layout = None
+    if args.layout_size:
+        layout = layout_memory(args.layout_size, args.seed)
+        print(f"\nLatest line items and ratios for {layout['companies']} companies: "
+              f"Series and dicts {layout['dict_layout_bytes'] / 1e6:.2f} MB, "
+              f"columnar store {layout['columnar_bytes'] / 1e6:.2f} MB ({layout['reduction']}x smaller)")
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "args": vars(args)
+        },
+        "results": results,
+        "layout_memory": layout
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    if args.baseline:
+        compare_to_baseline(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Fake Upstream
+A local stand-in for yfinance that serves recorded statement payloads over
+HTTP with injected latency and errors, for the "http" statement provider.
+
+    python benchmarks/fake_upstream.py --fixture-dir fixtures/statements --latency 0.3 --error-rate 0.02
+
+GET /statements/<ticker> answers with the FixtureProvider file format. Tickers
+without a recording are generated by SyntheticProvider unless --recorded-only
+is given, in which case they answer 404. GET /stats reports request counts.
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from statement_providers import SyntheticProvider, statements_to_dict  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+class FakeUpstream:
+    """Statement payloads plus the latency and failure behaviour to serve them with"""
+
+    def __init__(self, fixture_dir: Optional[str] = None, latency: float = 0.0, jitter: float = 0.0,
+                 error_rate: float = 0.0, timeout_rate: float = 0.0, timeout_delay: float = 30.0,
+                 recorded_only: bool = False, seed: int = 0):
+        """Initialize the upstream; recordings are read once and kept in memory"""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.recorded_only = recorded_only
+        self._synthetic = SyntheticProvider(seed=seed)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._payloads: Dict[str, bytes] = {}
+        self.counts = {"requests": 0, "ok": 0, "not_found": 0, "errors": 0, "timeouts": 0}
+
+        if fixture_dir and os.path.isdir(fixture_dir):
+            for filename in os.listdir(fixture_dir):
+                if filename.endswith(".json"):
+                    with open(os.path.join(fixture_dir, filename), "rb") as f:
+                        self._payloads[filename[:-len(".json")]] = f.read()
+        logger.info(f"Serving {len(self._payloads)} recorded tickers")
+
+    def _count(self, outcome: str) -> None:
+        with self._lock:
+            self.counts["requests"] += 1
+            self.counts[outcome] += 1
+
+    def _draw(self) -> float:
+        with self._lock:
+            return self._rng.random()
+
+    def payload(self, ticker: str) -> Optional[bytes]:
+        """The JSON body for a ticker, recorded or generated"""
+        payload = self._payloads.get(ticker)
+        if payload is None and not self.recorded_only:
+            statements = self._synthetic.fetch_statements(ticker)
+            payload = json.dumps({"ticker": ticker, "statements": statements_to_dict(statements)}).encode("utf-8")
+            with self._lock:
+                self._payloads[ticker] = payload
+        return payload
+
+    def respond(self, ticker: str):
+        """Sleep like a network round trip, then return (status, body)"""
+        if self.latency > 0:
+            time.sleep(self.latency * (1 + self.jitter * self._draw()))
+
+        draw = self._draw()
+        if draw < self.timeout_rate:
+            # Hang long enough for the client's timeout to fire
+            time.sleep(self.timeout_delay)
+            self._count("timeouts")
+            return 504, b'{"error": "upstream timeout"}'
+        if draw < self.timeout_rate + self.error_rate:
+            self._count("errors")
+            return 503, b'{"error": "injected failure"}'
+
+        payload = self.payload(ticker)
+        if payload is None:
+            self._count("not_found")
+            return 404, b'{"error": "unknown ticker"}'
+        self._count("ok")
+        return 200, payload
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.counts)
+
+
+def make_server(upstream: FakeUpstream, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """An HTTP server for upstream; port 0 picks a free port (see server.server_address)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/stats":
+                status, body = 200, json.dumps(upstream.stats()).encode("utf-8")
+            elif self.path.startswith("/statements/"):
+                status, body = upstream.respond(self.path[len("/statements/"):])
+            else:
+                status, body = 404, b'{"error": "not found"}'
+
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_in_background(upstream: FakeUpstream, host: str = "127.0.0.1", port: int = 0):
+    """Serve on a daemon thread; returns (server, base_url)"""
+    server = make_server(upstream, host, port)
+    threading.Thread(target=server.serve_forever, name="fake-upstream", daemon=True).start()
+    bound_host, bound_port = server.server_address[:2]
+    return server, f"http://{bound_host}:{bound_port}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--fixture-dir", default="fixtures/statements", help="recorded <ticker>.json payloads")
+    parser.add_argument("--recorded-only", action="store_true", help="404 for tickers without a recording")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this fraction of latency added at random")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="fraction of requests that hang")
+    parser.add_argument("--timeout-delay", type=float, default=30.0, help="seconds a hanging request hangs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    upstream = FakeUpstream(
+        fixture_dir=args.fixture_dir, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate, timeout_delay=args.timeout_delay,
+        recorded_only=args.recorded_only, seed=args.seed
+    )
+    server = make_server(upstream, args.host, args.port)
+    logger.info(f"Fake upstream listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Load Test
+Closed-loop HTTP load against a running app.py, backed by a local stand-in
+for yfinance (fake_upstream.py) with injected latency and errors.
+
+    python benchmarks/load_test.py --concurrency 1,4,16,64 --duration 20 --upstream-latency 0.3
+    python benchmarks/load_test.py --target http://staging:5000 --concurrency 8,32 --output load.json
+
+Each virtual user loads a frontend page (dashboard, a ratio page or compare),
+waits --think-time, and repeats until the level's time is up. Every level
+reports p50/p95/p99 latency, throughput, error rate and the response cache
+hit ratio (X-Cache), and the run ends with the concurrency at which the
+server saturated: throughput stopped growing, errors passed --max-error-rate
+or p99 passed --slo-p99.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_upstream import FakeUpstream, start_in_background  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Frontend pages and the API calls each one makes on load (src/lib/api.ts).
+# The ratio pages (liquidity, profitability, leverage, activity) share one query.
+PAGES = {
+    "dashboard": lambda pick: ["/api/companies", f"/api/company/{pick()}"],
+    "ratios": lambda pick: [f"/api/company/{pick()}"],
+    "compare": lambda pick: [_compare_url(pick)]
+}
+DEFAULT_MIX = "dashboard=4,ratios=4,compare=2"
+
+# A level saturates the server when throughput grows less than this over the previous level
+PLATEAU_GAIN = 0.05
+
+
+def _compare_url(pick) -> str:
+    first = pick()
+    second = pick()
+    while second == first:
+        second = pick()
+    return f"/api/compare?ticker1={first}&ticker2={second}"
+
+
+def endpoint_name(path: str) -> str:
+    """Group requests by route rather than by ticker"""
+    path = path.split("?")[0]
+    return "/api/company/<ticker>" if path.startswith("/api/company/") else path
+
+
+class TickerPicker:
+    """Zipf-distributed ticker choice, so a few popular companies take most of the traffic"""
+
+    def __init__(self, tickers: List[str], skew: float, rng: random.Random):
+        weights = [1.0 / (rank + 1) ** skew for rank in range(len(tickers))]
+        self.tickers = list(tickers)
+        rng.shuffle(self.tickers)
+        self.cumulative = list(accumulate(weights))
+        self.rng = rng
+
+    def __call__(self) -> str:
+        return self.tickers[bisect_left(self.cumulative, self.rng.random() * self.cumulative[-1])]
+
+
+def parse_mix(spec: str) -> Tuple[List[str], List[float]]:
+    names, weights = [], []
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        if name not in PAGES:
+            raise ValueError(f"Unknown page {name!r}; choose from {', '.join(PAGES)}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+def run_level(base_url: str, tickers: List[str], concurrency: int, args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Run concurrency closed-loop users for args.duration seconds; one record per request"""
+    page_names, page_weights = parse_mix(args.mix)
+    deadline = time.perf_counter() + args.duration
+    records: List[Dict[str, Any]] = []
+    lock = threading.Lock()
+
+    def user(index: int) -> None:
+        rng = random.Random(args.seed * 7919 + concurrency * 104729 + index)
+        pick = TickerPicker(tickers, args.skew, rng)
+        session = requests.Session()
+        local = []
+        while time.perf_counter() < deadline:
+            page = rng.choices(page_names, page_weights)[0]
+            for path in PAGES[page](pick):
+                started = time.perf_counter()
+                try:
+                    response = session.get(base_url + path, timeout=args.request_timeout)
+                    status, cache_status = response.status_code, response.headers.get("X-Cache")
+                except requests.RequestException:
+                    status, cache_status = 0, None
+                local.append({
+                    "page": page,
+                    "endpoint": endpoint_name(path),
+                    "status": status,
+                    "cache": cache_status,
+                    "latency": time.perf_counter() - started
+                })
+            if args.think_time > 0:
+                time.sleep(rng.expovariate(1 / args.think_time))
+        session.close()
+        with lock:
+            records.extend(local)
+
+    threads = [threading.Thread(target=user, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return records
+
+
+def summarize(records: List[Dict[str, Any]], duration: float) -> Dict[str, Any]:
+    """Latency percentiles, throughput, error rate and cache hit ratio for a set of requests"""
+    if not records:
+        return {"requests": 0}
+
+    latencies = np.array([record["latency"] for record in records]) * 1000
+    errors = sum(1 for record in records if record["status"] == 0 or record["status"] >= 500)
+    cached = [record["cache"] for record in records if record["cache"]]
+    hits = sum(1 for status in cached if status in ("HIT", "STALE"))
+    return {
+        "requests": len(records),
+        "throughput_rps": round(len(records) / duration, 2),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+        "max_ms": round(float(latencies.max()), 2),
+        "error_rate": round(errors / len(records), 4),
+        "client_errors": sum(1 for record in records if 400 <= record["status"] < 500),
+        "cache_hit_ratio": round(hits / len(cached), 4) if cached else None
+    }
+
+
+def find_saturation(levels: List[Dict[str, Any]], args: argparse.Namespace) -> Dict[str, Any]:
+    """The highest concurrency that still scaled, and why the next level did not"""
+    best = None
+    for level in levels:
+        overall = level["overall"]
+        if not overall.get("requests"):
+            return {"concurrency": best, "reason": f"no completed requests at concurrency {level['concurrency']}"}
+        if overall["error_rate"] > args.max_error_rate:
+            return {"concurrency": best, "reason": f"error rate {overall['error_rate']:.2%} at concurrency {level['concurrency']}"}
+        if args.slo_p99 and overall["p99_ms"] > args.slo_p99:
+            return {"concurrency": best, "reason": f"p99 {overall['p99_ms']} ms at concurrency {level['concurrency']}"}
+        if best is not None:
+            previous = next(item for item in levels if item["concurrency"] == best)["overall"]
+            if overall["throughput_rps"] < previous["throughput_rps"] * (1 + PLATEAU_GAIN):
+                return {"concurrency": best, "reason": f"throughput stopped growing at concurrency {level['concurrency']}"}
+        best = level["concurrency"]
+    return {"concurrency": None, "reason": "not saturated at the highest concurrency tested"}
+
+
+def start_app(upstream_url: str, port: int, args: argparse.Namespace, log_file) -> subprocess.Popen:
+    """Launch app.py against the stand-in upstream with a cold cache"""
+    env = dict(os.environ)
+    env.update({
+        "FINDASH_PROVIDER": "http",
+        "FINDASH_UPSTREAM_URL": upstream_url,
+        "FINDASH_UPSTREAM_TIMEOUT": str(args.upstream_timeout),
+        "FINDASH_STATEMENT_STORE": args.statement_store,
+        "FINDASH_SHARED_CACHE": "",
+        "FINDASH_WARMUP": "0",
+        "FINDASH_PREFETCH_INTERVAL": "0",
+        "FINDASH_HOST": "127.0.0.1",
+        "FINDASH_PORT": str(port),
+        "FINDASH_DEBUG": "0"
+    })
+    return subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, "app.py")], cwd=REPO_ROOT, env=env,
+        stdout=log_file, stderr=subprocess.STDOUT
+    )
+
+
+def wait_until_ready(base_url: str, timeout: float, process: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"app.py exited with status {process.returncode} before it was ready")
+        try:
+            if requests.get(base_url + "/", timeout=2).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{base_url} was not ready after {timeout:.0f}s")
+
+
+def stop_app(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated virtual user counts")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds per concurrency level")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"page weights (default {DEFAULT_MIX})")
+    parser.add_argument("--skew", type=float, default=1.0, help="Zipf exponent of ticker popularity (0 = uniform)")
+    parser.add_argument("--think-time", type=float, default=0.0, help="mean seconds between a user's pages")
+    parser.add_argument("--request-timeout", type=float, default=30.0)
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--slo-p99", type=float, help="p99 latency budget in ms")
+    parser.add_argument("--target", help="load an already running server instead of starting app.py")
+    parser.add_argument("--port", type=int, default=5055, help="port for the app.py this harness starts")
+    parser.add_argument("--restart-per-level", action="store_true",
+                        help="restart app.py before each level so every level starts with a cold cache")
+    parser.add_argument("--statement-store", default="", help="FINDASH_STATEMENT_STORE for the started app")
+    parser.add_argument("--app-log", help="file for the started app's output (default: a temp file)")
+    parser.add_argument("--fixture-dir", default=os.path.join(REPO_ROOT, "fixtures", "statements"))
+    parser.add_argument("--upstream-latency", type=float, default=0.3, help="seconds per upstream response")
+    parser.add_argument("--upstream-jitter", type=float, default=0.5)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-timeout-rate", type=float, default=0.0)
+    parser.add_argument("--upstream-timeout", type=float, default=10.0, help="FINDASH_UPSTREAM_TIMEOUT for the app")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write results as JSON to this path")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    upstream = server = process = None
+    log_file = None
+    if args.target:
+        base_url = args.target.rstrip("/")
+    else:
+        upstream = FakeUpstream(
+            fixture_dir=args.fixture_dir, latency=args.upstream_latency, jitter=args.upstream_jitter,
+            error_rate=args.upstream_error_rate, timeout_rate=args.upstream_timeout_rate,
+            timeout_delay=args.upstream_timeout * 2, seed=args.seed
+        )
+        server, upstream_url = start_in_background(upstream)
+        base_url = f"http://127.0.0.1:{args.port}"
+        log_path = args.app_log or tempfile.mkstemp(prefix="findash-load-", suffix=".log")[1]
+        log_file = open(log_path, "ab")
+        logger.info(f"Stand-in upstream at {upstream_url}; app output in {log_path}")
+
+    levels = []
+    try:
+        for concurrency in [int(value) for value in args.concurrency.split(",")]:
+            if upstream is not None and (process is None or args.restart_per_level):
+                if process is not None:
+                    stop_app(process)
+                process = start_app(upstream_url, args.port, args, log_file)
+                wait_until_ready(base_url, 60, process)
+            elif process is None:
+                wait_until_ready(base_url, 60)
+
+            tickers = [company["ticker"] for company in requests.get(base_url + "/api/companies", timeout=30).json()]
+            upstream_before = upstream.stats() if upstream else None
+
+            started = time.perf_counter()
+            records = run_level(base_url, tickers, concurrency, args)
+            elapsed = time.perf_counter() - started
+
+            level = {
+                "concurrency": concurrency,
+                "overall": summarize(records, elapsed),
+                "pages": {page: summarize([r for r in records if r["page"] == page], elapsed)
+                          for page in sorted({r["page"] for r in records})},
+                "endpoints": {endpoint: summarize([r for r in records if r["endpoint"] == endpoint], elapsed)
+                              for endpoint in sorted({r["endpoint"] for r in records})}
+            }
+            if upstream is not None:
+                upstream_after = upstream.stats()
+                level["upstream"] = {key: upstream_after[key] - upstream_before[key] for key in upstream_after}
+            levels.append(level)
+
+            overall = level["overall"]
+            hit_ratio = "n/a" if overall.get("cache_hit_ratio") is None else f"{overall['cache_hit_ratio']:.1%}"
+            logger.info(
+                f"c={concurrency:<4} {overall.get('throughput_rps', 0):>8} req/s  "
+                f"p50 {overall.get('p50_ms', 0):>8} ms  p95 {overall.get('p95_ms', 0):>8} ms  "
+                f"p99 {overall.get('p99_ms', 0):>8} ms  errors {overall.get('error_rate', 0):.2%}  "
+                f"cache hits {hit_ratio}"
+            )
+    finally:
+        if process is not None:
+            stop_app(process)
+        if server is not None:
+            server.shutdown()
+        if log_file is not None:
+            log_file.close()
+
+    saturation = find_saturation(levels, args)
+    logger.info(f"Saturation: concurrency {saturation['concurrency']} ({saturation['reason']})")
+
+    if args.output:
+        report = {
+            "meta": {
+                "timestamp": datetime.now().isoformat(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "args": vars(args)
+            },
+            "levels": levels,
+            "saturation": saturation
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Wrote results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Synthetic Universe
+Company universes of any size backed by SyntheticProvider, for benchmarks and load tests
+"""
+
+import os
+import random
+import string
+import sys
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from analysis_module import AnalysisEngine  # noqa: E402
+from company_registry import CompanyRegistry  # noqa: E402
+from financial_scraper import BEIDataScraper  # noqa: E402
+from statement_providers import SyntheticProvider  # noqa: E402
+
+# The sectors of the real universe; roughly one company in ten is a bank
+SECTORS = (
+    "Banking", "Telecommunications", "Consumer Goods", "Automotive", "Cement", "Food & Beverages",
+    "Pharmaceuticals", "Tobacco", "Mining", "Oil & Gas", "Infrastructure", "Retail"
+)
+SECTOR_WEIGHTS = (3, 1, 3, 2, 1, 3, 2, 1, 3, 2, 2, 3)
+
+
+def synthetic_ticker(index: int) -> str:
+    """A unique four-letter IDX-style ticker for an index (up to 26^4 companies)"""
+    letters = []
+    for _ in range(4):
+        index, remainder = divmod(index, 26)
+        letters.append(string.ascii_uppercase[remainder])
+    return "".join(reversed(letters)) + ".JK"
+
+
+def build_universe(size: int, seed: int = 0) -> Dict[str, Dict[str, str]]:
+    """{ticker: {"name", "sector"}} in the shape of a CompanyRegistry universe"""
+    rng = random.Random(seed)
+    sectors = rng.choices(SECTORS, weights=SECTOR_WEIGHTS, k=size)
+    return {
+        synthetic_ticker(index): {"name": f"Synthetic Company {index} Tbk", "sector": sector}
+        for index, sector in enumerate(sectors)
+    }
+
+
+def build_engine(size: int, latency: float = 0.0, seed: int = 0, max_workers: int = 8):
+    """A scraper and analysis engine over a synthetic universe, with no statement store"""
+    scraper = BEIDataScraper(
+        provider=SyntheticProvider(latency=latency, seed=seed),
+        registry=CompanyRegistry(companies=build_universe(size, seed))
+    )
+    analyzer = AnalysisEngine(scraper, max_workers=max_workers, peer_timeout=max(15.0, latency * 100))
+    return scraper, analyzer
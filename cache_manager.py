@@ -0,0 +1,473 @@
+"""
+Response Cache
+Bounded, thread-safe TTL/LRU cache used by the API layer
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional
+
+from response_encoding import json_default
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate memory footprint of a cached value by its JSON length"""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    return len(json.dumps(value, default=json_default))
+
+
+class _CacheEntry:
+    """A cached value with its timestamps, estimated size and encoded form"""
+
+    __slots__ = ("value", "created_at", "expires_at", "stale_until", "size", "encoded")
+
+    def __init__(self, value: Any, created_at: float, expires_at: float, stale_until: float, size: int,
+                 encoded: Any = None):
+        self.value = value
+        self.created_at = created_at
+        self.expires_at = expires_at
+        self.stale_until = stale_until
+        self.size = size
+        self.encoded = encoded
+
+
+class CacheLookup(NamedTuple):
+    """Outcome of TTLCache.lookup: the value, when it was computed and how it was served"""
+
+    value: Any
+    created_at: float
+    status: str  # "hit", "stale" or "miss"
+    encoded: Any = None
+
+    @property
+    def age(self) -> float:
+        return max(0.0, time.time() - self.created_at)
+
+
+class _Flight:
+    """An in-progress computation that followers wait on"""
+
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into a single computation"""
+
+    def __init__(self):
+        """Initialize with no calls in flight"""
+        self._lock = threading.Lock()
+        self._flights: Dict[Any, _Flight] = {}
+
+        self.leaders = 0
+        self.followers = 0
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """Run fn for key unless a call is already in flight, in which case wait for its outcome"""
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+                leader = True
+            else:
+                self.followers += 1
+                leader = False
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.event.set()
+
+    def in_flight(self) -> int:
+        """Number of keys currently being computed"""
+        with self._lock:
+            return len(self._flights)
+
+
+class AsyncSingleFlight:
+    """SingleFlight for coroutines: concurrent awaiters of one key share a single task"""
+
+    def __init__(self):
+        """Initialize with no tasks in flight (use from one event loop)"""
+        self._tasks: Dict[Any, "asyncio.Future"] = {}
+
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for key, or the task already running for it"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(key, None))
+            self.leaders += 1
+        else:
+            self.followers += 1
+
+        # A caller that gives up must not cancel the work others are waiting on
+        return await asyncio.shield(task)
+
+    def in_flight(self) -> int:
+        """Number of keys currently being awaited"""
+        return len(self._tasks)
+
+
+class TTLCache:
+    """LRU cache with per-key-family TTLs, an entry limit and an optional byte budget"""
+
+    def __init__(self, max_entries: int = 1000, max_bytes: Optional[int] = None,
+                 default_ttl: float = 3600, family_ttls: Optional[Dict[str, float]] = None,
+                 sizeof: Callable[[Any], int] = estimate_size, purge_interval: float = 60,
+                 stale_window: float = 0, refresh_workers: int = 2,
+                 encode: Optional[Callable[[Any], Any]] = None, shared: Optional[Any] = None,
+                 lease_timeout: float = 30, lease_poll: float = 0.05):
+        """
+        Initialize the cache.
+
+        family_ttls maps key prefixes (e.g. "company_data_") to TTLs in seconds;
+        the longest matching prefix wins and other keys use default_ttl.
+        Expired entries are swept at most once every purge_interval seconds.
+
+        A positive stale_window enables stale-while-revalidate: for that many
+        seconds past its TTL an entry is still served by lookup() while a
+        background worker recomputes it; after that it is gone for good.
+
+        With encode, every stored value is also encoded once on its way in
+        (e.g. into response bytes) and the encoded form is returned with
+        each lookup next to the value. An encoded form with a size attribute
+        (response_encoding.EncodedBody) counts against max_bytes as well.
+
+        With a shared backend (shared_cache.SharedCacheBackend) this cache is a
+        per-process front for a tier all workers on the host share: misses read
+        through to it, writes go to it with set-if-newer semantics, and a
+        cross-process lease lets one worker compute a key while the others poll
+        (every lease_poll seconds, for up to lease_timeout) for its result.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.family_ttls = dict(family_ttls or {})
+        self._sizeof = sizeof
+        self._encode = encode
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._bytes = 0
+
+        self._flights = SingleFlight()
+        self.stale_window = stale_window
+        self._refreshing = set()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=refresh_workers, thread_name_prefix="cache-refresh") \
+            if stale_window > 0 else None
+
+        self.shared = shared
+        self.lease_timeout = lease_timeout
+        self.lease_poll = lease_poll
+        self._last_shared_purge = time.time()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.shared_hits = 0
+        self.lease_waits = 0
+
+    def ttl_for(self, key: str) -> float:
+        """TTL of the key family the key belongs to"""
+        best_prefix = None
+        for prefix in self.family_ttls:
+            if key.startswith(prefix) and (best_prefix is None or len(prefix) > len(best_prefix)):
+                best_prefix = prefix
+        return self.family_ttls[best_prefix] if best_prefix is not None else self.default_ttl
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return a live value (from this process or the shared tier) and mark it recently used, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry.value
+
+            if entry is not None and now >= entry.stale_until:
+                self._remove(key)
+                self.expirations += 1
+
+        loaded = self._load_shared(key)
+        with self._lock:
+            if loaded is not None:
+                self.hits += 1
+                return loaded.value
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value, evicting least recently used entries to stay within budget"""
+        self._store(key, value, ttl)
+
+    def _store(self, key: str, value: Any, ttl: Optional[float] = None, created_at: Optional[float] = None,
+               share: bool = True) -> _CacheEntry:
+        encoded = self._encode(value) if self._encode is not None else None
+        size = 0
+        if self.max_bytes is not None:
+            # The entry holds the value and every encoded variant, so all of them count
+            size = self._sizeof(value) + getattr(encoded, "size", 0)
+        now = time.time() if created_at is None else created_at
+        expires_at = now + (ttl if ttl is not None else self.ttl_for(key))
+        entry = _CacheEntry(value, now, expires_at, expires_at + self.stale_window, size, encoded)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = entry
+            self._bytes += size
+            self._evict()
+
+        if share and self.shared is not None:
+            self._write_shared(key, entry)
+        return entry
+
+    def _write_shared(self, key: str, entry: _CacheEntry) -> None:
+        try:
+            self.shared.set(key, entry.value, entry.created_at, entry.expires_at, entry.stale_until)
+            if entry.created_at - self._last_shared_purge >= self.purge_interval:
+                self._last_shared_purge = entry.created_at
+                self.shared.purge()
+        except Exception as e:
+            logger.warning(f"Shared cache write of {key} failed: {str(e)}")
+
+    def _load_shared(self, key: str) -> Optional[_CacheEntry]:
+        # Copy a fresh value another process computed into this process
+        if self.shared is None:
+            return None
+        try:
+            shared = self.shared.get(key)
+        except Exception as e:
+            logger.warning(f"Shared cache read of {key} failed: {str(e)}")
+            return None
+        if shared is None:
+            return None
+
+        with self._lock:
+            self.shared_hits += 1
+        return self._store(key, shared.value, shared.expires_at - shared.created_at, shared.created_at, share=False)
+
+    def _lease_owner(self) -> str:
+        # Evaluated per call: workers forked from one preloaded parent must not share an owner
+        return f"{os.getpid()}-{id(self)}"
+
+    def _acquire_lease(self, key: str, owner: str) -> bool:
+        try:
+            return self.shared.acquire_lease(key, owner, self.lease_timeout)
+        except Exception as e:
+            logger.warning(f"Shared cache lease on {key} failed, computing anyway: {str(e)}")
+            return True
+
+    def _release_lease(self, key: str, owner: str) -> None:
+        try:
+            self.shared.release_lease(key, owner)
+        except Exception as e:
+            logger.warning(f"Shared cache lease release on {key} failed: {str(e)}")
+
+    def _wait_for_shared(self, key: str, owner: str) -> Optional[_CacheEntry]:
+        # Another worker holds the lease: wait for its result, or for the lease
+        # to come free (it failed or computed nothing) so this worker takes over
+        deadline = time.time() + self.lease_timeout
+        while time.time() < deadline:
+            time.sleep(self.lease_poll)
+            entry = self._load_shared(key)
+            if entry is not None or self._acquire_lease(key, owner):
+                return entry
+        logger.warning(f"Gave up waiting for another worker to compute {key}")
+        return None
+
+    def _evict(self) -> None:
+        # Expired entries go first, then the least recently used ones
+        now = time.time()
+        over_limit = len(self._entries) > self.max_entries or self._over_budget()
+        if over_limit or now - self._last_purge >= self.purge_interval:
+            self._last_purge = now
+            for key in [k for k, entry in self._entries.items() if now >= entry.stale_until]:
+                self._remove(key)
+                self.expirations += 1
+
+        while self._entries and (len(self._entries) > self.max_entries or self._over_budget()):
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+            logger.debug(f"Evicted cache entry {key}")
+
+    def _over_budget(self) -> bool:
+        return self.max_bytes is not None and self._bytes > self.max_bytes
+
+    def _peek(self, key: str) -> Optional[_CacheEntry]:
+        # Fresh entry without touching counters or LRU order
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry.expires_at:
+                return None
+            return entry
+
+    def _compute_and_store(self, key: str, compute: Callable[[], Any]) -> CacheLookup:
+        # A previous leader may have filled the key while this caller queued
+        entry = self._peek(key) or self._load_shared(key)
+        if entry is not None:
+            return CacheLookup(entry.value, entry.created_at, "hit", entry.encoded)
+
+        if self.shared is None:
+            return self._compute_locally(key, compute)
+
+        owner = self._lease_owner()
+        if not self._acquire_lease(key, owner):
+            with self._lock:
+                self.lease_waits += 1
+            entry = self._wait_for_shared(key, owner)
+            if entry is not None:
+                return CacheLookup(entry.value, entry.created_at, "hit", entry.encoded)
+
+        try:
+            return self._compute_locally(key, compute)
+        finally:
+            self._release_lease(key, owner)
+
+    def _compute_locally(self, key: str, compute: Callable[[], Any]) -> CacheLookup:
+        computed = compute()
+        if computed is None:
+            return CacheLookup(None, time.time(), "miss")
+        entry = self._store(key, computed)
+        return CacheLookup(entry.value, entry.created_at, "miss", entry.encoded)
+
+    def lookup(self, key: str, compute: Callable[[], Any], allow_stale: bool = True) -> CacheLookup:
+        """
+        Return the cached value, serving a stale one while it refreshes in the
+        background, or compute it with single-flight protection so concurrent
+        misses on one key run compute only once. None results are not cached.
+        With allow_stale=False a stale entry is recomputed (joining a refresh
+        already in flight) instead of served, for callers building a value
+        that will itself be cached as fresh.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.time()
+            if entry is not None and now < entry.expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return CacheLookup(entry.value, entry.created_at, "hit", entry.encoded)
+
+            if allow_stale and entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                self._schedule_refresh(key, compute)
+                return CacheLookup(entry.value, entry.created_at, "stale", entry.encoded)
+
+            self.misses += 1
+
+        return self._fill(key, compute)
+
+    def _fill(self, key: str, compute: Callable[[], Any]) -> CacheLookup:
+        # The only way into the key's flight: misses and background refreshes may
+        # join each other's flight, so every leader must produce a CacheLookup
+        return self._flights.do(key, lambda: self._compute_and_store(key, compute))
+
+    def __contains__(self, key: str) -> bool:
+        """True if key holds a fresh value; does not count as a hit or miss"""
+        return self._peek(key) is not None
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """Return the cached value, computing it (once per key) on a miss"""
+        return self.lookup(key, compute).value
+
+    def _schedule_refresh(self, key: str, compute: Callable[[], Any]) -> None:
+        # Called with the lock held; one background refresh per key at a time
+        if key in self._refreshing or self._refresh_executor is None:
+            return
+        self._refreshing.add(key)
+        self._refresh_executor.submit(self._refresh, key, compute)
+
+    def _refresh(self, key: str, compute: Callable[[], Any]) -> None:
+        try:
+            # Shares the flight (and any cross-process lease) with concurrent misses on the key
+            result = self._fill(key, compute)
+            if result.status == "miss" and result.value is not None:
+                with self._lock:
+                    self.refreshes += 1
+        except Exception as e:
+            logger.warning(f"Background refresh of {key} failed, keeping stale value: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    def clear(self) -> None:
+        """Remove every entry"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes if self.max_bytes is not None else None,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "coalesced": self._flights.followers,
+                "shared": self.shared is not None,
+                "shared_hits": self.shared_hits,
+                "lease_waits": self.lease_waits
+            }
@@ -0,0 +1,289 @@
+"""
+Columnar Store
+Ratios and latest-period line items of every company as float64 NumPy
+columns, read through lightweight per-company views
+"""
+
+import logging
+import threading
+from collections.abc import Mapping
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from ratio_engine import BALANCE_SHEET_ITEMS, BANKING_RATIOS, INCOME_STATEMENT_ITEMS, LINE_ITEMS, NON_BANKING_RATIOS
+
+logger = logging.getLogger(__name__)
+
+RATIO_FIELDS = tuple(dict.fromkeys(BANKING_RATIOS + NON_BANKING_RATIOS))
+
+
+class _ColumnTable:
+    """Named float64 columns (plus optional bool masks) sharing one append-only row space"""
+
+    def __init__(self, fields: Sequence[str], masks: Sequence[str] = (), capacity: int = 64):
+        self.fields = tuple(fields)
+        self.mask_fields = tuple(masks)
+        self.capacity = capacity
+        self.size = 0
+        self.columns: Dict[str, np.ndarray] = {field: np.full(capacity, np.nan) for field in self.fields}
+        self.masks: Dict[str, np.ndarray] = {field: np.zeros(capacity, dtype=bool) for field in self.mask_fields}
+
+    def append(self) -> int:
+        """Reserve the next row, doubling every column when full"""
+        if self.size == self.capacity:
+            capacity = self.capacity * 2
+            columns = {}
+            for field, column in self.columns.items():
+                columns[field] = np.full(capacity, np.nan)
+                columns[field][:self.size] = column[:self.size]
+            masks = {}
+            for field, mask in self.masks.items():
+                masks[field] = np.zeros(capacity, dtype=bool)
+                masks[field][:self.size] = mask[:self.size]
+            # Views read through these dicts, so each is replaced in one assignment
+            self.columns, self.masks, self.capacity = columns, masks, capacity
+
+        row = self.size
+        self.size += 1
+        return row
+
+    def compacted(self, rows: Sequence[int], min_capacity: int) -> "_ColumnTable":
+        """A new table holding only the given rows, in that order; this table is left untouched"""
+        positions = np.asarray(rows, dtype=np.intp)
+        table = _ColumnTable(self.fields, self.mask_fields, capacity=max(min_capacity, 2 * len(positions)))
+        for field, column in self.columns.items():
+            table.columns[field][:len(positions)] = column[positions]
+        for field, mask in self.masks.items():
+            table.masks[field][:len(positions)] = mask[positions]
+        table.size = len(positions)
+        return table
+
+    def row_equals(self, row: int, values: Dict[str, float], present: Optional[Dict[str, bool]] = None) -> bool:
+        for field in self.fields:
+            stored = self.columns[field][row]
+            value = values.get(field, np.nan)
+            if not (stored == value or (np.isnan(stored) and np.isnan(value))):
+                return False
+        for field, mask in self.masks.items():
+            if bool(mask[row]) != bool((present or {}).get(field, False)):
+                return False
+        return True
+
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values()) + sum(mask.nbytes for mask in self.masks.values())
+
+
+class _RowView(Mapping):
+    """Read-only mapping over one row of a table; values are read from the columns on access"""
+
+    __slots__ = ("_table", "_row", "_names")
+
+    def __init__(self, table: _ColumnTable, row: int, names: Tuple[str, ...]):
+        self._table = table
+        self._row = row
+        self._names = names
+
+    @property
+    def row(self) -> int:
+        return self._row
+
+    def __getitem__(self, name: str) -> float:
+        if name not in self._names:
+            raise KeyError(name)
+        return self._table.columns[name].item(self._row)
+
+    def get(self, name: str, default: Any = None) -> Any:
+        # Mapping.get would go through a raised KeyError for every missing name
+        if name not in self._names:
+            return default
+        return self._table.columns[name].item(self._row)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._names
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._names)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({dict(self)!r})"
+
+    def __reduce__(self):
+        # Pickled (e.g. into the shared cache tier) as a plain dict, not with the whole store
+        return dict, (dict(self),)
+
+
+class RatioView(_RowView):
+    """One company's ratios in the order the scalar calculators produce them"""
+
+    __slots__ = ()
+
+
+class LineItemView(_RowView):
+    """
+    The line items one statement reported for a company's latest period.
+    Like the Series it replaces, get() returns the default only for items
+    that were not reported; a reported NaN is returned as NaN.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, table: _ColumnTable, row: int, items: Tuple[str, ...]):
+        masks = table.masks
+        super().__init__(table, row, tuple(item for item in items if masks[item][row]))
+
+
+class ColumnarStore:
+    """
+    Ratios and calculator line items of every company in one float64 array
+    per field, with a ticker -> row map per table.
+
+    Rows are append-only: a company whose values change gets a fresh row and
+    its map entry moves there, so views handed out earlier (and cached inside
+    response payloads) keep showing the numbers they were built with. Writing
+    values identical to the current row reuses it.
+
+    Once superseded and forgotten rows outnumber live ones, the next append
+    first copies the live rows into a new table. Earlier views keep the old
+    table alive only for as long as something (e.g. a cache entry) holds
+    them, so memory stays proportional to the universe, not to its history.
+    """
+
+    def __init__(self, capacity: int = 64):
+        """Initialize empty ratio and line item tables"""
+        self._lock = threading.Lock()
+        self._capacity = capacity
+        self.compactions = 0
+
+        self._ratios = _ColumnTable(RATIO_FIELDS, capacity=capacity)
+        self._banking: List[bool] = []
+        self._ratio_rows: Dict[str, int] = {}
+
+        self._items = _ColumnTable(LINE_ITEMS, masks=LINE_ITEMS, capacity=capacity)
+        self._periods: List[str] = []
+        self._item_rows: Dict[str, int] = {}
+
+    def _compact(self, table: _ColumnTable, rows: Dict[str, int],
+                 labels: List[Any]) -> Tuple[_ColumnTable, Dict[str, int], List[Any]]:
+        # Called with the lock held; returns the (table, rows, labels) to keep using
+        live = len(rows)
+        if table.size - live <= max(live, self._capacity):
+            return table, rows, labels
+
+        tickers = list(rows)
+        kept = [rows[ticker] for ticker in tickers]
+        self.compactions += 1
+        logger.debug(f"Compacted {table.size} columnar rows to {live}")
+        return (
+            table.compacted(kept, self._capacity),
+            {ticker: row for row, ticker in enumerate(tickers)},
+            [labels[row] for row in kept]
+        )
+
+    def put_ratios(self, ticker: str, banking: bool, ratios: Dict[str, float]) -> RatioView:
+        """Store a company's ratios and return a view of them"""
+        names = BANKING_RATIOS if banking else NON_BANKING_RATIOS
+        values = {name: float(ratios[name]) for name in names if name in ratios}
+
+        with self._lock:
+            row = self._ratio_rows.get(ticker)
+            if row is None or self._banking[row] != banking or not self._ratios.row_equals(row, values):
+                self._ratios, self._ratio_rows, self._banking = self._compact(
+                    self._ratios, self._ratio_rows, self._banking
+                )
+                row = self._ratios.append()
+                self._banking.append(banking)
+                for name, value in values.items():
+                    self._ratios.columns[name][row] = value
+                self._ratio_rows[ticker] = row
+            table = self._ratios
+
+        return RatioView(table, row, names if len(values) == len(names) else tuple(values))
+
+    def ratios(self, ticker: str) -> Optional[RatioView]:
+        """A view of the ticker's latest stored ratios, or None"""
+        with self._lock:
+            row = self._ratio_rows.get(ticker)
+            if row is None:
+                return None
+            return RatioView(self._ratios, row, BANKING_RATIOS if self._banking[row] else NON_BANKING_RATIOS)
+
+    def put_line_items(self, ticker: str, balance_sheet: pd.Series, income_statement: pd.Series,
+                       period: str) -> Tuple[LineItemView, LineItemView]:
+        """Keep only the calculator line items of a latest-period statement pair; returns their views"""
+        values, present = {}, {}
+        for items, source in ((BALANCE_SHEET_ITEMS, balance_sheet), (INCOME_STATEMENT_ITEMS, income_statement)):
+            for item in items:
+                if item in source.index:
+                    values[item] = float(source[item])
+                    present[item] = True
+
+        with self._lock:
+            row = self._item_rows.get(ticker)
+            if row is None or self._periods[row] != period or not self._items.row_equals(row, values, present):
+                self._items, self._item_rows, self._periods = self._compact(
+                    self._items, self._item_rows, self._periods
+                )
+                row = self._items.append()
+                self._periods.append(period)
+                for item, value in values.items():
+                    self._items.columns[item][row] = value
+                    self._items.masks[item][row] = True
+                self._item_rows[ticker] = row
+            table = self._items
+
+        return (
+            LineItemView(table, row, BALANCE_SHEET_ITEMS),
+            LineItemView(table, row, INCOME_STATEMENT_ITEMS)
+        )
+
+    def line_item_frames(self, views: Dict[str, LineItemView]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        The ratio engine's (values, present) input for {ticker: line item view},
+        gathered column by column rather than company by company. Views are
+        read from their own table, so a compaction in between does not move them.
+        """
+        count = len(views)
+        values = {item: np.empty(count) for item in LINE_ITEMS}
+        present = {item: np.empty(count, dtype=bool) for item in LINE_ITEMS}
+
+        # Normally one group; views taken before a compaction point into the previous table
+        groups: Dict[int, Tuple[_ColumnTable, List[int], List[int]]] = {}
+        for position, view in enumerate(views.values()):
+            table, positions, rows = groups.setdefault(id(view._table), (view._table, [], []))
+            positions.append(position)
+            rows.append(view.row)
+
+        for table, positions, rows in groups.values():
+            positions, rows = np.asarray(positions, dtype=np.intp), np.asarray(rows, dtype=np.intp)
+            for item in LINE_ITEMS:
+                values[item][positions] = table.columns[item][rows]
+                present[item][positions] = table.masks[item][rows]
+
+        index = pd.Index(list(views))
+        return pd.DataFrame(values, index=index), pd.DataFrame(present, index=index)
+
+    def forget(self, ticker: str) -> None:
+        """
+        Stop mapping a ticker (e.g. after delisting) so its rows are dropped
+        at the next compaction; views already handed out stay valid
+        """
+        with self._lock:
+            self._ratio_rows.pop(ticker, None)
+            self._item_rows.pop(ticker, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """Live and total rows of each table, the bytes their columns hold and compactions so far"""
+        with self._lock:
+            return {
+                "ratio_rows": self._ratios.size,
+                "ratio_companies": len(self._ratio_rows),
+                "line_item_rows": self._items.size,
+                "line_item_companies": len(self._item_rows),
+                "bytes": self._ratios.nbytes() + self._items.nbytes(),
+                "compactions": self.compactions
+            }
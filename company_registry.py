@@ -0,0 +1,249 @@
+"""
+Company Registry
+The listed-company universe loaded from a JSON or CSV file, indexed by
+ticker and sector, and reloaded when the file changes
+"""
+
+import csv
+import json
+import logging
+import os
+import threading
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPANIES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "companies.json")
+
+REQUIRED_FIELDS = ("ticker", "name", "sector")
+
+
+def parse_companies(path: str) -> Dict[str, Dict[str, str]]:
+    """
+    Read {ticker: {"name", "sector"}} from a file.
+
+    JSON files hold a list of {"ticker", "name", "sector"} records (optionally
+    under a "companies" key) or a {ticker: {"name", "sector"}} mapping. CSV
+    files need ticker, name and sector columns. Incomplete rows are skipped.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = list(csv.DictReader(f))
+        else:
+            payload = json.load(f)
+            if isinstance(payload, dict) and "companies" in payload:
+                payload = payload["companies"]
+            if isinstance(payload, dict):
+                records = [{"ticker": ticker, **info} for ticker, info in payload.items()]
+            else:
+                records = payload
+
+    companies = {}
+    for line, record in enumerate(records, start=1):
+        values = {field: str(record.get(field) or "").strip() for field in REQUIRED_FIELDS}
+        if not all(values.values()):
+            logger.warning(f"Skipping incomplete company record {line} in {path}")
+            continue
+
+        ticker = values["ticker"].upper()
+        if ticker in companies:
+            logger.warning(f"Duplicate ticker {ticker} in {path}; keeping the later record")
+        companies[ticker] = {"name": values["name"], "sector": values["sector"]}
+
+    return companies
+
+
+class RegistrySnapshot:
+    """One immutable version of the universe with everything derived from it computed up front"""
+
+    __slots__ = ("version", "companies", "sector_tickers", "companies_list", "sectors_summary")
+
+    def __init__(self, version: int, companies: Dict[str, Dict[str, str]]):
+        self.version = version
+        self.companies: Mapping[str, Mapping[str, str]] = MappingProxyType(
+            {ticker: MappingProxyType(dict(info)) for ticker, info in companies.items()}
+        )
+
+        by_sector: Dict[str, List[str]] = {}
+        for ticker, info in companies.items():
+            by_sector.setdefault(info["sector"], []).append(ticker)
+        self.sector_tickers: Mapping[str, Tuple[str, ...]] = MappingProxyType(
+            {sector: tuple(tickers) for sector, tickers in by_sector.items()}
+        )
+
+        # Response bodies for /api/companies and /api/sectors; shared, so callers must not mutate them
+        self.companies_list = [
+            {"ticker": ticker, "name": info["name"], "sector": info["sector"]}
+            for ticker, info in companies.items()
+        ]
+        self.sectors_summary = {
+            sector: {
+                "name": sector,
+                "companies": [{"ticker": ticker, "name": companies[ticker]["name"]} for ticker in tickers],
+                "total_companies": len(tickers)
+            }
+            for sector, tickers in by_sector.items()
+        }
+
+
+# listener(previous, current) called after the universe changes
+ReloadListener = Callable[[RegistrySnapshot, RegistrySnapshot], None]
+
+
+class CompanyRegistry:
+    """
+    Ticker and sector lookups over the company universe.
+
+    Readers always see one complete snapshot: a reload builds the next
+    version on the side and swaps it in with a single assignment, so lookups
+    never take a lock. With reload_interval set, watch() polls the file and
+    reloads it when its modification time or size changes.
+    """
+
+    def __init__(self, path: Optional[str] = None, companies: Optional[Dict[str, Dict[str, str]]] = None,
+                 reload_interval: Optional[float] = None):
+        """Initialize the registry from a file, or from a {ticker: {"name", "sector"}} mapping"""
+        self.path = path
+        self.reload_interval = reload_interval
+
+        self._lock = threading.Lock()
+        self._listeners: List[ReloadListener] = []
+        self._signature: Optional[Tuple[int, int]] = None
+        self._snapshot = RegistrySnapshot(0, {})
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[str] = None
+
+        if companies is not None:
+            self.replace(companies)
+        elif path is not None:
+            self.reload(force=True)
+
+    def _file_signature(self) -> Optional[Tuple[int, int]]:
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Re-read the file if it changed since the last load (or always, with
+        force); returns whether a new version was installed. A file that
+        cannot be read or parsed leaves the current version in place.
+        """
+        if self.path is None:
+            return False
+
+        with self._lock:
+            signature = self._file_signature()
+            if not force and signature == self._signature:
+                return False
+
+            # Remembered even when parsing fails, so a broken file is reported once, not every poll
+            self._signature = signature
+            try:
+                companies = parse_companies(self.path)
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Could not load companies from {self.path}: {str(e)}")
+                return False
+
+            self.last_error = None
+            previous = self._install(companies)
+
+        logger.info(f"Loaded {len(companies)} companies from {self.path} (version {self.version})")
+        self._notify(previous)
+        return True
+
+    def replace(self, companies: Dict[str, Dict[str, str]]) -> None:
+        """Install a universe given directly rather than read from the file"""
+        with self._lock:
+            previous = self._install(companies)
+        self._notify(previous)
+
+    def _install(self, companies: Dict[str, Dict[str, str]]) -> RegistrySnapshot:
+        previous = self._snapshot
+        self._snapshot = RegistrySnapshot(previous.version + 1, companies)
+        return previous
+
+    def add_reload_listener(self, listener: ReloadListener) -> None:
+        """Register a callback invoked with (previous, current) snapshots after every change"""
+        self._listeners.append(listener)
+
+    def _notify(self, previous: RegistrySnapshot) -> None:
+        current = self._snapshot
+        for listener in self._listeners:
+            try:
+                listener(previous, current)
+            except Exception as e:
+                logger.error(f"Company registry listener failed: {str(e)}")
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """The current version of the universe"""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        return self._snapshot.version
+
+    @property
+    def companies(self) -> Mapping[str, Mapping[str, str]]:
+        """Read-only {ticker: {"name", "sector"}} of the current version"""
+        return self._snapshot.companies
+
+    def get(self, ticker: str) -> Optional[Mapping[str, str]]:
+        return self._snapshot.companies.get(ticker)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._snapshot.companies
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.companies)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.companies)
+
+    def sectors(self) -> List[str]:
+        return list(self._snapshot.sector_tickers)
+
+    def sector_tickers(self, sector: str) -> Tuple[str, ...]:
+        """Tickers of every company in a sector (a dict lookup, not a scan)"""
+        return self._snapshot.sector_tickers.get(sector, ())
+
+    def companies_list(self) -> List[Dict[str, str]]:
+        """[{"ticker", "name", "sector"}, ...], built once per version"""
+        return self._snapshot.companies_list
+
+    def sectors_summary(self) -> Dict[str, Any]:
+        """{sector: {"name", "companies", "total_companies"}}, built once per version"""
+        return self._snapshot.sectors_summary
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.reload_interval):
+            self.reload()
+
+    def watch(self) -> None:
+        """Poll the file every reload_interval seconds on a background thread"""
+        if self._thread is not None or not self.path or not self.reload_interval:
+            return
+        self._thread = threading.Thread(target=self._watch, name="company-registry", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop watching the file"""
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Source, version and size of the universe, and the last load error if any"""
+        snapshot = self._snapshot
+        return {
+            "source": self.path,
+            "version": snapshot.version,
+            "companies": len(snapshot.companies),
+            "sectors": len(snapshot.sector_tickers),
+            "reload_interval": self.reload_interval,
+            "last_error": self.last_error
+        }
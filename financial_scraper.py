@@ -3,116 +3,196 @@ Financial Data Scraper for Indonesian Public Companies
 Handles data retrieval from yfinance and ratio calculations
 """
 
-import yfinance as yf
 import pandas as pd
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Mapping, Optional, Tuple, Any
+from statement_providers import StatementProvider, YFinanceProvider
+from statement_store import StatementStore
+from company_registry import DEFAULT_COMPANIES_FILE, CompanyRegistry
+from columnar_store import ColumnarStore
+from unit_of_work import current_unit_of_work
+from cache_manager import SingleFlight
+from ratio_engine import build_line_items, calculate_ratio_records
+from metrics import UPSTREAM_FETCHES, stage
 
 logger = logging.getLogger(__name__)
 
 class BEIDataScraper:
     """Main class for scraping and processing BEI (Indonesian Stock Exchange) data"""
     
-    def __init__(self):
-        """Initialize the scraper with company data"""
-        self.companies = {
-            "BBCA.JK": {"name": "Bank Central Asia Tbk", "sector": "Banking"},
-            "BMRI.JK": {"name": "Bank Mandiri (Persero) Tbk", "sector": "Banking"},
-            "BBRI.JK": {"name": "Bank Rakyat Indonesia (Persero) Tbk", "sector": "Banking"},
-            "BBNI.JK": {"name": "Bank Negara Indonesia (Persero) Tbk", "sector": "Banking"},
-            "TLKM.JK": {"name": "Telkom Indonesia (Persero) Tbk", "sector": "Telecommunications"},
-            "UNVR.JK": {"name": "Unilever Indonesia Tbk", "sector": "Consumer Goods"},
-            "ASII.JK": {"name": "Astra International Tbk", "sector": "Automotive"},
-            "INTP.JK": {"name": "Indocement Tunggal Prakarsa Tbk", "sector": "Cement"},
-            "SMGR.JK": {"name": "Semen Indonesia (Persero) Tbk", "sector": "Cement"},
-            "ICBP.JK": {"name": "Indofood CBP Sukses Makmur Tbk", "sector": "Food & Beverages"},
-            "INDF.JK": {"name": "Indofood Sukses Makmur Tbk", "sector": "Food & Beverages"},
-            "KLBF.JK": {"name": "Kalbe Farma Tbk", "sector": "Pharmaceuticals"},
-            "GGRM.JK": {"name": "Gudang Garam Tbk", "sector": "Tobacco"},
-            "HMSP.JK": {"name": "HM Sampoerna Tbk", "sector": "Tobacco"},
-            "PTBA.JK": {"name": "Bukit Asam (Persero) Tbk", "sector": "Mining"},
-            "PGAS.JK": {"name": "Perusahaan Gas Negara (Persero) Tbk", "sector": "Oil & Gas"},
-            "JSMR.JK": {"name": "Jasa Marga (Persero) Tbk", "sector": "Infrastructure"},
-            "ADRO.JK": {"name": "Adaro Energy Tbk", "sector": "Mining"},
-            "LPPF.JK": {"name": "Matahari Department Store Tbk", "sector": "Retail"},
-            "MAPI.JK": {"name": "Mitra Adiperkasa Tbk", "sector": "Retail"}
-        }
+    def __init__(self, provider: Optional[StatementProvider] = None, store: Optional[StatementStore] = None,
+                 registry: Optional[CompanyRegistry] = None):
+        """Initialize the scraper with the company registry, a statement provider and an optional store"""
+        self.provider = provider or YFinanceProvider()
+        self.store = store
+        
+        # Concurrent requests for one ticker share a single store/provider load
+        self._statement_flights = SingleFlight()
+        
+        # Callbacks notified with [(ticker, sector, ratios), ...] whenever ratios are recalculated
+        self._ratio_listeners: List[Callable[[List[Tuple[str, str, Dict[str, float]]]], None]] = []
         
-        logger.info(f"Initialized scraper with {len(self.companies)} companies")
+        # Latest line items and ratios of every company, one float64 column per field
+        self.columns = ColumnarStore()
+        
+        # Ticker and sector lookups over the universe file, reloadable without a restart
+        self.registry = registry if registry is not None else CompanyRegistry(DEFAULT_COMPANIES_FILE)
+        
+        logger.info(f"Initialized scraper with {len(self.companies)} companies using {self.provider.name} provider")
+    
+    @property
+    def companies(self) -> Mapping[str, Mapping[str, str]]:
+        """Read-only {ticker: {"name", "sector"}} of the registry's current version"""
+        return self.registry.companies
     
     def get_companies_list(self) -> List[Dict[str, str]]:
-        """Return list of all available companies"""
-        try:
-            companies_list = []
-            for ticker, info in self.companies.items():
-                companies_list.append({
-                    "ticker": ticker,
-                    "name": info["name"],
-                    "sector": info["sector"]
-                })
-            
-            return companies_list
-            
-        except Exception as e:
-            logger.error(f"Error getting companies list: {str(e)}")
-            raise
+        """Return list of all available companies (built once per registry version)"""
+        return self.registry.companies_list()
     
     def get_company_info(self, ticker: str) -> Optional[Dict[str, str]]:
         """Get basic company information"""
-        try:
-            if ticker not in self.companies:
-                logger.warning(f"Company {ticker} not found in database")
-                return None
-            
-            return {
-                "ticker": ticker,
-                "name": self.companies[ticker]["name"],
-                "sector": self.companies[ticker]["sector"]
-            }
-            
-        except Exception as e:
-            logger.error(f"Error getting company info for {ticker}: {str(e)}")
+        info = self.registry.get(ticker)
+        if info is None:
+            logger.warning(f"Company {ticker} not found in database")
             return None
+        
+        return {
+            "ticker": ticker,
+            "name": info["name"],
+            "sector": info["sector"]
+        }
     
-    def get_financial_data(self, ticker: str) -> Optional[Dict[str, Any]]:
-        """Retrieve financial data from yfinance"""
+    def add_ratio_listener(self, listener: Callable[[List[Tuple[str, str, Dict[str, float]]]], None]) -> None:
+        """
+        Register a callback invoked with a list of (ticker, sector, ratios)
+        updates every time ratios are recalculated; batch calculations
+        deliver all their companies in one call
+        """
+        self._ratio_listeners.append(listener)
+    
+    def stored_tickers(self) -> List[str]:
+        """Known tickers whose statements are already in the store"""
+        if not self.store:
+            return []
+        return [ticker for ticker in self.store.tickers() if ticker in self.registry]
+    
+    def _load_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Serve statements from the store, falling back to the provider for unseen tickers"""
+        if self.store:
+            with stage("statement_store_load", ticker=ticker):
+                stored = self.store.load(ticker)
+            if stored:
+                logger.info(f"Loaded statements for {ticker} from store")
+                return stored
+        
         try:
-            logger.info(f"Fetching financial data for {ticker}")
-            
-            # Create yfinance ticker object
-            stock = yf.Ticker(ticker)
-            
-            # Get financial statements
+            with stage("upstream_fetch", ticker=ticker):
+                statements = self.provider.fetch_statements(ticker)
+        except Exception:
+            UPSTREAM_FETCHES.inc(provider=self.provider.name, outcome="error")
+            raise
+        
+        UPSTREAM_FETCHES.inc(provider=self.provider.name, outcome="ok" if statements else "empty")
+        if not statements:
+            return None
+        
+        if self.store and not statements["balance_sheet"].empty:
             try:
-                balance_sheet = stock.balance_sheet
-                income_stmt = stock.financials
-                cash_flow = stock.cashflow
+                self.store.save(ticker, statements)
             except Exception as e:
-                logger.warning(f"Could not fetch all financial statements for {ticker}: {str(e)}")
+                logger.warning(f"Could not store statements for {ticker}: {str(e)}")
+        
+        return statements
+    
+    def fetch_stats(self) -> Dict[str, int]:
+        """Statement loads in progress right now and how many callers joined one instead of loading"""
+        return {
+            "in_flight": self._statement_flights.in_flight(),
+            "coalesced": self._statement_flights.followers
+        }
+    
+    def get_financial_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Retrieve financial data, at most once per ticker within a unit of work"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.memoize("statements", ticker, lambda: self._fetch_financial_data(ticker))
+        return self._fetch_financial_data(ticker)
+    
+    def _fetch_financial_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Retrieve financial data from the statement store or provider"""
+        logger.info(f"Fetching financial data for {ticker}")
+        
+        # Get financial statements
+        try:
+            statements = self._statement_flights.do(ticker, lambda: self._load_statements(ticker))
+        except Exception as e:
+            logger.warning(f"Could not fetch all financial statements for {ticker}: {str(e)}")
+            return None
+        
+        return self._build_financial_data(ticker, statements)
+    
+    def _stored_financial_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Financial data from the statement store only, however old; never calls the provider"""
+        try:
+            statements = self.store.load(ticker, allow_outdated=True) if self.store else None
+        except Exception as e:
+            logger.warning(f"Could not read stored statements for {ticker}: {str(e)}")
+            return None
+        
+        return self._build_financial_data(ticker, statements)
+    
+    def _build_financial_data(self, ticker: str, statements: Optional[Dict[str, pd.DataFrame]]) -> Optional[Dict[str, Any]]:
+        """Keep the latest-period line items of a statement set and its full history"""
+        try:
+            if not statements:
+                logger.warning(f"No financial statements available for {ticker}")
                 return None
             
+            balance_sheet = statements["balance_sheet"]
+            income_stmt = statements["income_statement"]
+            cash_flow = statements["cash_flow"]
+            
             if balance_sheet.empty or income_stmt.empty:
                 logger.warning(f"Empty financial data for {ticker}")
                 return None
             
-            # Get the most recent data (first column)
-            latest_bs = balance_sheet.iloc[:, 0] if not balance_sheet.empty else pd.Series()
-            latest_income = income_stmt.iloc[:, 0] if not income_stmt.empty else pd.Series()
-            latest_cf = cash_flow.iloc[:, 0] if not cash_flow.empty else pd.Series()
+            # Only the calculator line items of the most recent period (first column) are kept
+            period = self._format_period(balance_sheet.columns[0])
+            latest_bs, latest_income = self.columns.put_line_items(
+                ticker, balance_sheet.iloc[:, 0], income_stmt.iloc[:, 0], period
+            )
             
             return {
                 "balance_sheet": latest_bs,
                 "income_statement": latest_income,
-                "cash_flow": latest_cf,
-                "period": balance_sheet.columns[0].strftime('%Y-Q%q') if not balance_sheet.empty else "2024-Q1"
+                "period": period,
+                # Every available period, newest first, for trend calculations
+                "history": {
+                    "balance_sheet": balance_sheet,
+                    "income_statement": income_stmt,
+                    "cash_flow": cash_flow
+                }
             }
             
         except Exception as e:
             logger.error(f"Error fetching financial data for {ticker}: {str(e)}")
             return None
     
+    @staticmethod
+    def _format_period(period_end: Any) -> str:
+        """Label a statement column date as YYYY-Qn"""
+        period_end = pd.Timestamp(period_end)
+        return f"{period_end.year}-Q{(period_end.month - 1) // 3 + 1}"
+    
     def calculate_ratios(self, ticker: str) -> Optional[Dict[str, Any]]:
+        """Calculate financial ratios, at most once per ticker within a unit of work"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.memoize("ratios", ticker, lambda: self._calculate_ratios(ticker))
+        return self._calculate_ratios(ticker)
+    
+    @stage("calculate_ratios")
+    def _calculate_ratios(self, ticker: str) -> Optional[Dict[str, Any]]:
         """Calculate financial ratios based on company sector"""
         try:
             financial_data = self.get_financial_data(ticker)
@@ -134,6 +214,9 @@ class BEIDataScraper:
             else:
                 ratios = self._calculate_non_banking_ratios(bs, income)
             
+            ratios = self.columns.put_ratios(ticker, sector == "Banking", ratios)
+            self._notify_ratio_listeners([(ticker, sector, ratios)])
+            
             return {
                 "period": financial_data["period"],
                 "ratios": ratios
@@ -143,6 +226,65 @@ class BEIDataScraper:
             logger.error(f"Error calculating ratios for {ticker}: {str(e)}")
             return None
     
+    @stage("calculate_ratios_batch")
+    def calculate_ratios_batch(self, tickers: List[str], store_only: bool = False) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Calculate ratios for many companies in one vectorized pass. With
+        store_only, statements come only from the store (outdated ones
+        included) and companies without stored statements are skipped.
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {ticker: None for ticker in tickers}
+        views = {}
+        periods = {}
+        sectors = {}
+        
+        for ticker in tickers:
+            company_info = self.get_company_info(ticker)
+            if not company_info:
+                continue
+            
+            financial_data = self._stored_financial_data(ticker) if store_only else self.get_financial_data(ticker)
+            if not financial_data:
+                continue
+            
+            views[ticker] = financial_data["balance_sheet"]
+            periods[ticker] = financial_data["period"]
+            sectors[ticker] = company_info["sector"]
+        
+        if not views:
+            return results
+        
+        try:
+            items, present = self.columns.line_item_frames(views)
+            banking = pd.Series({ticker: sector == "Banking" for ticker, sector in sectors.items()})
+            records = {
+                ticker: self.columns.put_ratios(ticker, sectors[ticker] == "Banking", ratios)
+                for ticker, ratios in calculate_ratio_records(items, banking, present).items()
+            }
+        except Exception as e:
+            logger.error(f"Error calculating batch ratios: {str(e)}")
+            return results
+        
+        self._notify_ratio_listeners([(ticker, sectors[ticker], ratios) for ticker, ratios in records.items()])
+        
+        uow = current_unit_of_work()
+        for ticker, ratios in records.items():
+            result = {"period": periods[ticker], "ratios": ratios}
+            if uow is not None:
+                result = uow.memoize("ratios", ticker, lambda: result)
+            results[ticker] = result
+        
+        logger.info(f"Calculated batch ratios for {len(records)} companies")
+        return results
+    
+    def _notify_ratio_listeners(self, updates: List[Tuple[str, str, Dict[str, float]]]) -> None:
+        """Tell every registered listener which companies' ratios were recalculated"""
+        for listener in self._ratio_listeners:
+            try:
+                listener(updates)
+            except Exception as e:
+                logger.warning(f"Ratio listener failed for {len(updates)} companies: {str(e)}")
+    
     def _calculate_banking_ratios(self, bs: pd.Series, income: pd.Series) -> Dict[str, float]:
         """Calculate ratios specific to banking companies"""
         try:
@@ -323,64 +465,81 @@ class BEIDataScraper:
             'inventoryTurnover': 6.0
         }
     
-    def get_trend_data(self, ticker: str, periods: int = 4) -> List[Dict[str, Any]]:
-        """Get historical trend data for the last few periods"""
+    def get_ratio_history(self, ticker: str) -> List[Dict[str, Any]]:
+        """Ratios for every statement period in chronological order, at most once per unit of work"""
+        uow = current_unit_of_work()
+        if uow is not None:
+            return uow.memoize("ratio_history", ticker, lambda: self._calculate_ratio_history(ticker))
+        return self._calculate_ratio_history(ticker)
+    
+    @stage("ratio_history")
+    def _calculate_ratio_history(self, ticker: str) -> List[Dict[str, Any]]:
+        """Compute ratios for all available periods in one vectorized pass"""
         try:
-            # For demo purposes, generate mock trend data
-            # In production, this would fetch actual historical data
-            
-            base_ratios = self.calculate_ratios(ticker)
-            if not base_ratios:
+            financial_data = self.get_financial_data(ticker)
+            company_info = self.get_company_info(ticker)
+            if not financial_data or not company_info:
                 return []
             
-            trend_data = []
-            current_period = datetime.now()
-            
-            for i in range(periods):
-                period_date = current_period - timedelta(days=90 * i)  # Quarterly data
-                period_str = f"{period_date.year}-Q{(period_date.month-1)//3 + 1}"
-                
-                # Add some variation to base values for trend simulation
-                variation = 1 + (i * 0.02)  # Small trend
-                
-                if 'currentRatio' in base_ratios['ratios']:
-                    value = base_ratios['ratios']['currentRatio'] * variation
+            balance_sheets = financial_data["history"]["balance_sheet"]
+            income_stmts = financial_data["history"]["income_statement"]
+            
+            statements = {}
+            for i, column in enumerate(balance_sheets.columns):
+                # Match the income statement by date, falling back to position like the latest period does
+                if column in income_stmts.columns:
+                    income = income_stmts[column]
+                elif i < len(income_stmts.columns):
+                    income = income_stmts.iloc[:, i]
                 else:
-                    value = base_ratios['ratios']['roe'] / 10  # Use ROE for banking
-                
-                trend_data.append({
-                    "period": period_str,
-                    "value": round(value, 2)
-                })
+                    income = pd.Series(dtype=float)
+                statements[(ticker, self._format_period(column))] = (balance_sheets[column], income)
+            
+            if not statements:
+                return []
+            
+            items, present = build_line_items(statements)
+            banking = pd.Series(company_info["sector"] == "Banking", index=items.index)
+            records = calculate_ratio_records(items, banking, present)
             
-            return list(reversed(trend_data))  # Return chronological order
+            history = [
+                {"period": period, "ratios": records[(ticker, period)]}
+                for (_, period) in statements
+            ]
+            return list(reversed(history))  # Statement columns are newest first
             
         except Exception as e:
-            logger.error(f"Error getting trend data for {ticker}: {str(e)}")
+            logger.error(f"Error calculating ratio history for {ticker}: {str(e)}")
             return []
     
-    def get_sectors_summary(self) -> Dict[str, Any]:
-        """Get summary of all sectors and their companies"""
+    @stage("trend_data")
+    def get_trend_data(self, ticker: str, periods: int = 4, ratio: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get historical values of one ratio for the last few statement periods"""
         try:
-            sectors = {}
-            
-            for ticker, info in self.companies.items():
-                sector = info["sector"]
-                if sector not in sectors:
-                    sectors[sector] = {
-                        "name": sector,
-                        "companies": [],
-                        "total_companies": 0
-                    }
-                
-                sectors[sector]["companies"].append({
-                    "ticker": ticker,
-                    "name": info["name"]
-                })
-                sectors[sector]["total_companies"] += 1
-            
-            return sectors
+            history = self.get_ratio_history(ticker)
+            if not history:
+                return []
+            
+            if ratio is None:
+                # Liquidity for most companies, profitability for banks
+                ratio = 'currentRatio' if 'currentRatio' in history[-1]['ratios'] else 'roe'
+            
+            if ratio not in history[-1]['ratios']:
+                logger.warning(f"Ratio {ratio} is not available for {ticker}")
+                return []
+            
+            return [
+                {
+                    "period": entry["period"],
+                    "value": round(entry["ratios"][ratio], 2)
+                }
+                for entry in history[-periods:]
+            ]
             
         except Exception as e:
-            logger.error(f"Error getting sectors summary: {str(e)}")
-            raise
\ No newline at end of file
+            logger.error(f"Error getting trend data for {ticker}: {str(e)}")
+            return []
+    
+    def get_sectors_summary(self) -> Dict[str, Any]:
+        """Get summary of all sectors and their companies (built once per registry version)"""
+        return self.registry.sectors_summary()
\ No newline at end of file
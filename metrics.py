@@ -0,0 +1,213 @@
+"""
+Metrics
+Dependency-free counters, gauges and latency histograms rendered in the
+Prometheus text exposition format
+"""
+
+import bisect
+import functools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from tracing import close_span, open_span
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (name, type, help, labels, value) produced at scrape time by a collector
+Sample = Tuple[str, str, str, Dict[str, str], float]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric:
+    """A named metric family with one child per combination of label values"""
+
+    type_name = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = self._header()
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.labelnames, key)))} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """Value that goes up and down"""
+
+    type_name = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Latency distribution in fixed buckets; observe() is a bisect plus two additions"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, then sum and count
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = {key: ([*series[0]], series[1], series[2]) for key, series in self._values.items()}
+        lines = self._header()
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels({**labels, "le": _format_value(float(bound))})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Every metric of the process plus collectors that report values owned elsewhere"""
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], Iterable[Sample]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collect: Callable[[], Iterable[Sample]]) -> None:
+        """Register a callback that reports (name, type, help, labels, value) samples at scrape time"""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        """The whole registry in Prometheus text format"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+
+        families: Dict[str, List[Sample]] = {}
+        for collect in self._collectors:
+            try:
+                for sample in collect():
+                    families.setdefault(sample[0], []).append(sample)
+            except Exception as e:
+                logger.warning(f"Metrics collector failed: {str(e)}")
+
+        for name, samples in families.items():
+            _, type_name, help_text, _, _ = samples[0]
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {type_name}")
+            for _, _, _, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(float(value))}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.register(Histogram(
+    "findash_stage_duration_seconds", "Time spent in each internal computation stage", ["stage"]
+))
+REQUEST_SECONDS = registry.register(Histogram(
+    "findash_request_duration_seconds", "HTTP request latency by endpoint", ["endpoint", "method", "status"]
+))
+REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "findash_requests_in_flight", "HTTP requests currently being served", ["endpoint"]
+))
+UPSTREAM_FETCHES = registry.register(Counter(
+    "findash_upstream_fetches_total", "Statement downloads from the provider by outcome",
+    ["provider", "outcome"]
+))
+
+
+class stage:
+    """
+    Time a block (with stage("name"):) or a function (@stage("name"))
+    into findash_stage_duration_seconds, and into the request's timing tree
+    when it is traced. attrs only annotate the trace; they are not labels.
+    """
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+        self._started: Optional[float] = None
+        self._span = None
+
+    def __call__(self, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            # A fresh timer per call, so concurrent calls don't share _started
+            with stage(self.name, **self.attrs):
+                return fn(*args, **kwargs)
+        return timed
+
+    def __enter__(self) -> "stage":
+        self._span = open_span(self.name, **self.attrs)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        STAGE_SECONDS.observe(time.perf_counter() - self._started, stage=self.name)
+        close_span(self._span)
+        return False
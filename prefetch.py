@@ -0,0 +1,136 @@
+"""
+Universe Prefetch Scheduler
+Warms statements, ratios, health scores and sector averages ahead of traffic
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PrefetchScheduler:
+    """Loads the whole company universe once at startup and then every interval seconds"""
+
+    def __init__(self, warm_ticker: Callable[[str], Any], tickers: Callable[[], List[str]],
+                 max_workers: int = 4, interval: Optional[float] = None,
+                 warm_batch: Optional[Callable[[List[str]], int]] = None, batch_size: int = 50):
+        """
+        Initialize the scheduler.
+
+        warm_ticker computes (and caches) everything served for one ticker;
+        tickers returns the current universe. At most max_workers tickers are
+        warmed at once. With no interval only the initial warm-up runs.
+
+        When warm_batch is given the universe is instead split into chunks of
+        batch_size, each warmed by one warm_batch call that returns how many of
+        its tickers succeeded; max_workers then bounds concurrent chunks.
+        """
+        self.warm_ticker = warm_ticker
+        self.tickers = tickers
+        self.max_workers = max_workers
+        self.interval = interval
+        self.warm_batch = warm_batch
+        self.batch_size = max(1, batch_size)
+
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.runs = 0
+        self.last_run: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        """True once the first warm-up pass has finished"""
+        return self._ready.is_set()
+
+    def _warm_one(self, ticker: str) -> bool:
+        try:
+            self.warm_ticker(ticker)
+            return True
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {ticker}: {str(e)}")
+            return False
+
+    def _warm_chunk(self, tickers: List[str]) -> int:
+        try:
+            return self.warm_batch(tickers)
+        except Exception as e:
+            logger.warning(f"Prefetch failed for a batch of {len(tickers)} companies: {str(e)}")
+            return 0
+
+    def run_once(self) -> Dict[str, Any]:
+        """Warm every ticker in the universe, bounded by max_workers"""
+        tickers = self.tickers()
+        started = time.time()
+        logger.info(f"Prefetching {len(tickers)} companies with {self.max_workers} workers")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="prefetch") as executor:
+            if self.warm_batch is not None:
+                chunks = [tickers[i:i + self.batch_size] for i in range(0, len(tickers), self.batch_size)]
+                succeeded = sum(executor.map(self._warm_chunk, chunks))
+            else:
+                succeeded = sum(executor.map(self._warm_one, tickers))
+
+        summary = {
+            "started_at": started,
+            "duration": round(time.time() - started, 3),
+            "companies": len(tickers),
+            "succeeded": succeeded,
+            "failed": len(tickers) - succeeded
+        }
+
+        with self._lock:
+            self.runs += 1
+            self.last_run = summary
+            self.last_error = None
+
+        self._ready.set()
+        logger.info(f"Prefetch finished: {summary}")
+        return summary
+
+    def _run_guarded(self, description: str) -> None:
+        try:
+            self.run_once()
+        except Exception as e:
+            with self._lock:
+                self.last_error = str(e)
+            logger.error(f"{description} failed: {str(e)}")
+
+    def _loop(self) -> None:
+        try:
+            self._run_guarded("Initial prefetch")
+        finally:
+            # A failed warm-up must not leave the app reporting "warming" forever
+            self._ready.set()
+
+        while self.interval and not self._stop.wait(self.interval):
+            self._run_guarded("Scheduled prefetch")
+
+    def start(self) -> None:
+        """Run the warm-up (and any scheduled refreshes) on a background thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="prefetch-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop scheduling further prefetch runs"""
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        """Readiness, the outcome of the most recent run and the last run error if any"""
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "runs": self.runs,
+                "interval": self.interval,
+                "last_run": self.last_run,
+                "last_error": self.last_error
+            }
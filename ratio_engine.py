@@ -0,0 +1,178 @@
+"""
+Vectorized Ratio Engine
+Computes every financial ratio for many companies (or company periods) in one pass
+"""
+
+import logging
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+BANKING_RATIOS = ('roe', 'roa', 'nim', 'ldr', 'car')
+NON_BANKING_RATIOS = (
+    'currentRatio', 'quickRatio', 'cashRatio', 'roe', 'roa', 'npm', 'gpm',
+    'der', 'dar', 'assetTurnover', 'inventoryTurnover'
+)
+
+# Line items the calculators read, by the statement they come from
+BALANCE_SHEET_ITEMS = (
+    'Total Stockholder Equity', 'Stockholders Equity', 'Total Assets', 'Current Assets',
+    'Current Liabilities', 'Inventory', 'Cash And Cash Equivalents', 'Cash', 'Total Debt'
+)
+INCOME_STATEMENT_ITEMS = (
+    'Net Income', 'Total Revenue', 'Operating Revenue', 'Gross Profit', 'Cost Of Revenue'
+)
+LINE_ITEMS = BALANCE_SHEET_ITEMS + INCOME_STATEMENT_ITEMS
+
+
+def build_line_items(statements: Dict[Hashable, Tuple[pd.Series, pd.Series]]) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Build the engine's input from (balance sheet, income statement) Series pairs.
+
+    Keys become the row index (tickers, or (ticker, period) tuples for a
+    companies x periods layout). Returns the line item values and a mask of
+    which items each statement actually reported, since a reported NaN and a
+    missing item fall back differently.
+    """
+    keys = list(statements)
+    values = np.full((len(keys), len(LINE_ITEMS)), np.nan)
+    present = np.zeros((len(keys), len(LINE_ITEMS)), dtype=bool)
+
+    for row, key in enumerate(keys):
+        bs, income = statements[key]
+        for column, item in enumerate(LINE_ITEMS):
+            source = bs if column < len(BALANCE_SHEET_ITEMS) else income
+            if item in source.index:
+                values[row, column] = source[item]
+                present[row, column] = True
+
+    if keys and all(isinstance(key, tuple) for key in keys):
+        index = pd.MultiIndex.from_tuples(keys)
+    else:
+        index = pd.Index(keys)
+
+    return (
+        pd.DataFrame(values, index=index, columns=list(LINE_ITEMS)),
+        pd.DataFrame(present, index=index, columns=list(LINE_ITEMS))
+    )
+
+
+def _item(items: pd.DataFrame, present: pd.DataFrame, *names: str) -> np.ndarray:
+    """Vectorized equivalent of series.get(name1, series.get(name2, 0))"""
+    result = np.zeros(len(items))
+    resolved = np.zeros(len(items), dtype=bool)
+    for name in names:
+        if name not in items.columns:
+            continue
+        take = present[name].to_numpy(dtype=bool) & ~resolved
+        result = np.where(take, items[name].to_numpy(dtype=float), result)
+        resolved |= take
+    return result
+
+
+def _masked(condition: np.ndarray, value: np.ndarray, fallback: float) -> np.ndarray:
+    return np.where(condition, value, fallback)
+
+
+def calculate_banking_ratios(items: pd.DataFrame, present: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Banking ratios for every row, matching BEIDataScraper._calculate_banking_ratios"""
+    if present is None:
+        present = items.notna()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_equity = _item(items, present, 'Total Stockholder Equity', 'Stockholders Equity')
+        net_income = _item(items, present, 'Net Income')
+        total_assets = _item(items, present, 'Total Assets')
+        total_revenue = _item(items, present, 'Total Revenue', 'Operating Revenue')
+        current_assets = _item(items, present, 'Current Assets')
+        current_liabilities = _item(items, present, 'Current Liabilities')
+
+        has_equity = total_equity != 0
+        has_assets = total_assets != 0
+
+        ratios = {
+            'roe': _masked(has_equity, (net_income / total_equity) * 100, 0.0),
+            'roa': _masked(has_assets, (net_income / total_assets) * 100, 0.0),
+            'nim': _masked(has_assets, (total_revenue / total_assets) * 100, 0.0),
+            'ldr': _masked(current_liabilities != 0, (current_assets / current_liabilities) * 100, 0.0),
+            'car': _masked(has_equity, (total_equity / total_assets) * 100, 0.0)
+        }
+
+    return pd.DataFrame(ratios, index=items.index, columns=list(BANKING_RATIOS))
+
+
+def calculate_non_banking_ratios(items: pd.DataFrame, present: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Non-banking ratios for every row, matching BEIDataScraper._calculate_non_banking_ratios"""
+    if present is None:
+        present = items.notna()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        current_assets = _item(items, present, 'Current Assets')
+        current_liabilities = _item(items, present, 'Current Liabilities')
+        inventory = _item(items, present, 'Inventory')
+        cash = _item(items, present, 'Cash And Cash Equivalents', 'Cash')
+        total_assets = _item(items, present, 'Total Assets')
+        total_equity = _item(items, present, 'Total Stockholder Equity', 'Stockholders Equity')
+        total_debt = _item(items, present, 'Total Debt')
+
+        net_income = _item(items, present, 'Net Income')
+        total_revenue = _item(items, present, 'Total Revenue')
+        gross_profit = _item(items, present, 'Gross Profit')
+        cost_of_revenue = _item(items, present, 'Cost Of Revenue')
+
+        has_liabilities = current_liabilities != 0
+        has_equity = total_equity != 0
+        has_assets = total_assets != 0
+        has_revenue = total_revenue != 0
+
+        # A reported gross profit wins unless it is exactly zero (NaN counts as reported)
+        gross_profit_used = np.where(gross_profit != 0, gross_profit, total_revenue - cost_of_revenue)
+
+        ratios = {
+            'currentRatio': _masked(has_liabilities, current_assets / current_liabilities, 1.0),
+            'quickRatio': _masked(has_liabilities, (current_assets - inventory) / current_liabilities, 0.8),
+            'cashRatio': _masked(has_liabilities, cash / current_liabilities, 0.3),
+            'roe': _masked(has_equity, (net_income / total_equity) * 100, 0.0),
+            'roa': _masked(has_assets, (net_income / total_assets) * 100, 0.0),
+            'npm': _masked(has_revenue, (net_income / total_revenue) * 100, 0.0),
+            'gpm': _masked(has_revenue, (gross_profit_used / total_revenue) * 100, 0.0),
+            'der': _masked(has_equity, total_debt / total_equity, 0.0),
+            'dar': _masked(has_assets, total_debt / total_assets, 0.0),
+            'assetTurnover': _masked(has_assets, total_revenue / total_assets, 0.0),
+            'inventoryTurnover': _masked(inventory != 0, cost_of_revenue / inventory, 0.0)
+        }
+
+    return pd.DataFrame(ratios, index=items.index, columns=list(NON_BANKING_RATIOS))
+
+
+def calculate_ratio_records(items: pd.DataFrame, banking: pd.Series,
+                            present: Optional[pd.DataFrame] = None) -> Dict[Hashable, Dict[str, float]]:
+    """
+    Compute ratios for a mixed universe and return one ratio dict per row.
+
+    banking is a boolean Series aligned with items' index that picks the
+    banking or non-banking calculator for each row.
+    """
+    if present is None:
+        present = items.notna()
+
+    banking = banking.reindex(items.index).fillna(False).astype(bool)
+    records = {}
+
+    for is_banking, calculator, ratio_names in (
+        (True, calculate_banking_ratios, BANKING_RATIOS),
+        (False, calculate_non_banking_ratios, NON_BANKING_RATIOS)
+    ):
+        mask = (banking == is_banking).to_numpy()
+        if not mask.any():
+            continue
+
+        frame = calculator(items[mask], present[mask])
+        values = frame.to_numpy()
+        for key, row in zip(frame.index, values):
+            records[key] = dict(zip(ratio_names, row.tolist()))
+
+    return records
@@ -0,0 +1,102 @@
+"""
+Response Encoding
+Serializes API payloads once into ready-to-send JSON bytes and compressed variants
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import math
+from collections.abc import Mapping
+from typing import Any, Iterable, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Bodies smaller than this are not worth a compressed copy
+MIN_COMPRESS_SIZE = 512
+
+
+def json_default(value: Any) -> Any:
+    """Serialize read-only mappings (the columnar store's views) as objects and anything else as text"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _finite(value: Any) -> Any:
+    # The standard library writes NaN and Infinity, which are not JSON; orjson writes null
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, Mapping):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    return value
+
+
+def dumps(value: Any) -> bytes:
+    """
+    Compact, sorted-key JSON bytes with NaN and infinities as null; orjson
+    when installed, the standard library otherwise
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=json_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_finite(value), sort_keys=True, separators=(",", ":"), default=json_default).encode("utf-8")
+
+
+class EncodedBody:
+    """A payload serialized once, with its compressed variants and content hash"""
+
+    __slots__ = ("identity", "gzip", "br", "etag")
+
+    def __init__(self, identity: bytes, gzip_body: Optional[bytes], br_body: Optional[bytes]):
+        self.identity = identity
+        self.gzip = gzip_body
+        self.br = br_body
+        self.etag = hashlib.sha256(identity).hexdigest()[:32]
+
+    @property
+    def size(self) -> int:
+        """Bytes held by every variant together"""
+        return len(self.identity) + len(self.gzip or b"") + len(self.br or b"")
+
+    def select(self, accepted: Any) -> Tuple[Optional[str], bytes]:
+        """
+        Pick the variant for an Accept-Encoding header (werkzeug's
+        request.accept_encodings): brotli, then gzip, then plain JSON.
+        Returns the Content-Encoding (None for identity) and the body.
+        """
+        if self.br is not None and accepted["br"]:
+            return "br", self.br
+        if self.gzip is not None and accepted["gzip"]:
+            return "gzip", self.gzip
+        return None, self.identity
+
+
+def combine_etags(parts: Iterable[str]) -> str:
+    """One entity tag for a response assembled from several encoded parts"""
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def encode_body(value: Any) -> EncodedBody:
+    """Serialize value and precompute gzip (and brotli, when installed) variants"""
+    identity = dumps(value)
+    if len(identity) < MIN_COMPRESS_SIZE:
+        return EncodedBody(identity, None, None)
+
+    gzip_body = gzip.compress(identity, compresslevel=GZIP_LEVEL, mtime=0)
+    br_body = brotli.compress(identity, quality=BROTLI_QUALITY) if brotli is not None else None
+    return EncodedBody(identity, gzip_body, br_body)
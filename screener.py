@@ -0,0 +1,135 @@
+"""
+Ratio Screener
+Per-ratio sorted indexes over the latest ratios of every company
+"""
+
+import bisect
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+HEALTH_SCORE_FIELD = "health_score"
+
+
+class RatioScreener:
+    """Answers range/sort queries over company ratios with binary searches instead of refetches"""
+
+    def __init__(self):
+        """Initialize empty indexes"""
+        self._lock = threading.RLock()
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        # field -> sorted list of (value, ticker); non-finite values are not indexed
+        self._indexes: Dict[str, List[Tuple[float, str]]] = {}
+        self._sectors: Dict[str, Set[str]] = {}
+
+    @staticmethod
+    def _indexable(value: Any) -> bool:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+
+    def _fields(self, row: Dict[str, Any]) -> Dict[str, float]:
+        fields = {name: value for name, value in row["ratios"].items() if self._indexable(value)}
+        if self._indexable(row[HEALTH_SCORE_FIELD]):
+            fields[HEALTH_SCORE_FIELD] = row[HEALTH_SCORE_FIELD]
+        return fields
+
+    def _unindex(self, ticker: str) -> None:
+        row = self._rows.pop(ticker, None)
+        if row is None:
+            return
+
+        for field, value in self._fields(row).items():
+            index = self._indexes[field]
+            position = bisect.bisect_left(index, (value, ticker))
+            if position < len(index) and index[position] == (value, ticker):
+                index.pop(position)
+        self._sectors[row["sector"]].discard(ticker)
+
+    def update(self, ticker: str, sector: str, ratios: Dict[str, float], health_score: Optional[float]) -> None:
+        """Re-index one company after its ratios (and health score) were refreshed"""
+        row = {
+            "sector": sector,
+            "banking": sector == "Banking",
+            "ratios": dict(ratios),
+            HEALTH_SCORE_FIELD: health_score
+        }
+
+        with self._lock:
+            self._unindex(ticker)
+            self._rows[ticker] = row
+            for field, value in self._fields(row).items():
+                bisect.insort(self._indexes.setdefault(field, []), (float(value), ticker))
+            self._sectors.setdefault(sector, set()).add(ticker)
+
+    def remove(self, ticker: str) -> None:
+        """Drop a company from every index"""
+        with self._lock:
+            self._unindex(ticker)
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._rows
+
+    def fields(self) -> List[str]:
+        """Every field that can be filtered or sorted on"""
+        with self._lock:
+            return sorted(self._indexes)
+
+    def _range(self, field: str, low: Optional[float], high: Optional[float]) -> Set[str]:
+        index = self._indexes.get(field, [])
+        start = 0 if low is None else bisect.bisect_left(index, (low, ""))
+        # (high, chr(0x10FFFF)) sorts after every (high, ticker) pair
+        end = len(index) if high is None else bisect.bisect_right(index, (high, chr(0x10FFFF)))
+        return {ticker for _, ticker in index[start:end]}
+
+    def screen(self, ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+               sector: Optional[str] = None, banking: Optional[bool] = None,
+               sort_by: str = HEALTH_SCORE_FIELD, descending: bool = True,
+               limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        Return companies matching every inclusive (low, high) range in ranges,
+        ordered by sort_by. Companies without a value for sort_by come last.
+        """
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+
+            if sector is not None:
+                candidates = set(self._sectors.get(sector, set()))
+
+            # Narrowest ranges first keeps the intersections small
+            matches = sorted((self._range(field, low, high) for field, (low, high) in (ranges or {}).items()), key=len)
+            for match in matches:
+                candidates = match if candidates is None else candidates & match
+
+            if candidates is None:
+                candidates = set(self._rows)
+
+            if banking is not None:
+                candidates = {ticker for ticker in candidates if self._rows[ticker]["banking"] == banking}
+
+            # Walk the sort index only as far as the requested page needs
+            wanted = offset + limit
+            ordered = []
+            index = self._indexes.get(sort_by, [])
+            for _, ticker in (reversed(index) if descending else index):
+                if len(ordered) >= wanted:
+                    break
+                if ticker in candidates:
+                    ordered.append(ticker)
+            if len(ordered) < wanted:
+                ordered.extend(sorted(candidates.difference(ordered))[:wanted - len(ordered)])
+
+            page = ordered[offset:wanted]
+            return {
+                "total": len(candidates),
+                "results": [
+                    {
+                        "ticker": ticker,
+                        "sector": self._rows[ticker]["sector"],
+                        HEALTH_SCORE_FIELD: self._rows[ticker][HEALTH_SCORE_FIELD],
+                        "ratios": self._rows[ticker]["ratios"]
+                    }
+                    for ticker in page
+                ]
+            }
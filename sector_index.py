@@ -0,0 +1,178 @@
+"""
+Sector Aggregate Index
+Running per-sector sums and counts of every ratio, maintained one company at a time
+"""
+
+import logging
+import math
+import threading
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SectorAggregateIndex:
+    """Incrementally maintained sector averages so industry averages are a lookup"""
+
+    def __init__(self):
+        """Initialize an empty index"""
+        self._lock = threading.Lock()
+        self._sums: Dict[str, Dict[str, float]] = {}
+        self._counts: Dict[str, Dict[str, int]] = {}
+        self._members: Dict[str, Dict[str, Dict[str, float]]] = {}
+        self._ticker_sectors: Dict[str, str] = {}
+
+        # Per-sector companies x ratios matrices, rebuilt lazily when the sector changes
+        self._versions: Dict[str, int] = {}
+        self._matrices: Dict[str, Tuple[int, List[str], np.ndarray, Dict[str, np.ndarray]]] = {}
+
+    @staticmethod
+    def _finite_items(ratios: Dict[str, float]):
+        # Non-finite values would poison the running sums permanently, so they are not indexed
+        for ratio_name, value in ratios.items():
+            if isinstance(value, (int, float)) and math.isfinite(value):
+                yield ratio_name, float(value)
+
+    def _subtract(self, ticker: str) -> None:
+        sector = self._ticker_sectors.pop(ticker, None)
+        if sector is None:
+            return
+
+        self._versions[sector] = self._versions.get(sector, 0) + 1
+        previous = self._members[sector].pop(ticker)
+        sums = self._sums[sector]
+        counts = self._counts[sector]
+        for ratio_name, value in self._finite_items(previous):
+            counts[ratio_name] -= 1
+            if counts[ratio_name] == 0:
+                del counts[ratio_name]
+                del sums[ratio_name]
+            else:
+                sums[ratio_name] -= value
+
+    def update(self, ticker: str, sector: str, ratios: Dict[str, float]) -> None:
+        """Replace one company's contribution to its sector in O(number of ratios)"""
+        with self._lock:
+            self._subtract(ticker)
+
+            sums = self._sums.setdefault(sector, {})
+            counts = self._counts.setdefault(sector, {})
+            for ratio_name, value in self._finite_items(ratios):
+                sums[ratio_name] = sums.get(ratio_name, 0.0) + value
+                counts[ratio_name] = counts.get(ratio_name, 0) + 1
+
+            self._members.setdefault(sector, {})[ticker] = dict(ratios)
+            self._ticker_sectors[ticker] = sector
+            self._versions[sector] = self._versions.get(sector, 0) + 1
+
+    def update_many(self, updates: List[Tuple[str, str, Dict[str, float]]]) -> None:
+        """Apply a batch of (ticker, sector, ratios) updates"""
+        for ticker, sector, ratios in updates:
+            self.update(ticker, sector, ratios)
+
+    def remove(self, ticker: str) -> None:
+        """Drop a company from the index"""
+        with self._lock:
+            self._subtract(ticker)
+
+    def clear(self) -> None:
+        """Forget every company"""
+        with self._lock:
+            self._sums.clear()
+            self._counts.clear()
+            self._members.clear()
+            self._ticker_sectors.clear()
+            self._versions.clear()
+            self._matrices.clear()
+
+    def __contains__(self, ticker: str) -> bool:
+        return ticker in self._ticker_sectors
+
+    def members(self, sector: str) -> Set[str]:
+        """Tickers currently contributing to a sector"""
+        with self._lock:
+            return set(self._members.get(sector, {}))
+
+    def averages(self, sector: str) -> Tuple[Dict[str, float], int]:
+        """Return the per-ratio averages of a sector and how many companies contribute"""
+        with self._lock:
+            sums = self._sums.get(sector, {})
+            counts = self._counts.get(sector, {})
+            averages = {ratio_name: sums[ratio_name] / counts[ratio_name] for ratio_name in sums}
+            return averages, len(self._members.get(sector, {}))
+
+    def _sector_matrix(self, sector: str) -> Optional[Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]]:
+        """Ratio names, the companies x ratios matrix (NaN where missing) and sorted finite columns"""
+        version = self._versions.get(sector)
+        members = self._members.get(sector)
+        if version is None or not members:
+            return None
+
+        cached = self._matrices.get(sector)
+        if cached is not None and cached[0] == version:
+            return cached[1:]
+
+        ratio_names = sorted(self._counts.get(sector, {}))
+        matrix = np.full((len(members), len(ratio_names)), np.nan)
+        for row, ratios in enumerate(members.values()):
+            for column, ratio_name in enumerate(ratio_names):
+                value = ratios.get(ratio_name)
+                if isinstance(value, (int, float)) and math.isfinite(value):
+                    matrix[row, column] = value
+
+        sorted_columns = {}
+        for column, ratio_name in enumerate(ratio_names):
+            values = matrix[:, column]
+            sorted_columns[ratio_name] = np.sort(values[~np.isnan(values)])
+
+        self._matrices[sector] = (version, ratio_names, matrix, sorted_columns)
+        return ratio_names, matrix, sorted_columns
+
+    def percentile_ranks(self, sector: str, ratios: Dict[str, float]) -> Dict[str, float]:
+        """Percentile rank (0-100, ties at their midpoint) of each ratio within its sector"""
+        with self._lock:
+            built = self._sector_matrix(sector)
+            if built is None:
+                return {}
+            _, _, sorted_columns = built
+
+            ranks = {}
+            for ratio_name, value in self._finite_items(ratios):
+                column = sorted_columns.get(ratio_name)
+                if column is None or len(column) == 0:
+                    continue
+                below = np.searchsorted(column, value, side='left')
+                at_or_below = np.searchsorted(column, value, side='right')
+                ranks[ratio_name] = round(float((below + at_or_below) / 2 / len(column) * 100), 1)
+            return ranks
+
+    def distribution(self, sector: str) -> Dict[str, Dict[str, Any]]:
+        """Count, mean, median, quartiles, min/max and standard deviation of every ratio in a sector"""
+        with self._lock:
+            built = self._sector_matrix(sector)
+            if built is None:
+                return {}
+            ratio_names, matrix, _ = built
+
+            counts = np.sum(~np.isnan(matrix), axis=0)
+            with np.errstate(all='ignore'):
+                q1, median, q3 = np.nanpercentile(matrix, [25, 50, 75], axis=0)
+                stats = {
+                    "count": counts,
+                    "mean": np.nanmean(matrix, axis=0),
+                    "median": median,
+                    "q1": q1,
+                    "q3": q3,
+                    "min": np.nanmin(matrix, axis=0),
+                    "max": np.nanmax(matrix, axis=0),
+                    "std": np.nanstd(matrix, axis=0)
+                }
+
+            return {
+                ratio_name: {name: (int(values[column]) if name == "count" else float(values[column]))
+                             for name, values in stats.items()}
+                for column, ratio_name in enumerate(ratio_names)
+                if counts[column] > 0
+            }
@@ -0,0 +1,139 @@
+"""
+Shared Cache Backend
+SQLite (WAL) second cache tier shared by every worker process on a host
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import time
+from typing import Any, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SharedEntry(NamedTuple):
+    """A value read back from the shared tier with its timestamps"""
+
+    value: Any
+    created_at: float
+    expires_at: float
+
+
+class SharedCacheBackend:
+    """
+    Cross-process key/value store with set-if-newer writes and compute leases.
+
+    Values are pickled, so the file must only be shared between processes
+    running this application.
+    """
+
+    def __init__(self, db_path: str):
+        """Initialize the backend, creating the database file if needed"""
+        self.db_path = db_path
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    stale_until REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+        logger.info(f"Shared cache ready at {db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per operation, like the statement store
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def get(self, key: str) -> Optional[SharedEntry]:
+        """Return the key's value if it is still fresh, else None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT value, created_at, expires_at FROM cache_entries WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+
+        if row is None:
+            return None
+        try:
+            return SharedEntry(pickle.loads(row[0]), row[1], row[2])
+        except Exception as e:
+            logger.warning(f"Discarding unreadable shared cache entry {key}: {str(e)}")
+            return None
+
+    def set(self, key: str, value: Any, created_at: float, expires_at: float, stale_until: float) -> bool:
+        """
+        Store a value unless the stored one was computed later; returns whether
+        it was written. The comparison happens inside SQLite, so concurrent
+        writers from different processes can never replace newer data.
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                INSERT INTO cache_entries (key, value, created_at, expires_at, stale_until)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    value = excluded.value,
+                    created_at = excluded.created_at,
+                    expires_at = excluded.expires_at,
+                    stale_until = excluded.stale_until
+                WHERE excluded.created_at > cache_entries.created_at
+            """, (key, blob, created_at, expires_at, stale_until))
+            return cursor.rowcount > 0
+
+    def acquire_lease(self, key: str, owner: str, duration: float) -> bool:
+        """
+        Try to become the only process computing key for the next duration
+        seconds. Succeeds if nobody holds the lease, it expired, or owner
+        already holds it.
+        """
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute("""
+                INSERT INTO cache_leases (key, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT (key) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE cache_leases.expires_at <= ? OR cache_leases.owner = excluded.owner
+            """, (key, owner, now + duration, now))
+            return cursor.rowcount > 0
+
+    def release_lease(self, key: str, owner: str) -> None:
+        """Give up a lease held by owner"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_leases WHERE key = ? AND owner = ?", (key, owner))
+
+    def delete(self, key: str) -> None:
+        """Remove a key if present"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Remove every entry and lease"""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_leases")
+
+    def purge(self) -> int:
+        """Delete entries past their stale window and expired leases; returns entries removed"""
+        now = time.time()
+        with self._connect() as conn:
+            removed = conn.execute("DELETE FROM cache_entries WHERE stale_until <= ?", (now,)).rowcount
+            conn.execute("DELETE FROM cache_leases WHERE expires_at <= ?", (now,))
+        return removed
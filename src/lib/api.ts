@@ -37,6 +37,9 @@ export interface CompanyData {
     total_companies_in_sector: number;
     [key: string]: any;
   };
+  sector_percentiles?: {
+    [ratio: string]: number;
+  };
   health_score?: number;
 }
 
@@ -68,4 +71,30 @@ export const fetchCompanies = async () => {
     throw new Error(`Failed to fetch companies: ${response.statusText}`);
   }
   return response.json();
-};
\ No newline at end of file
+};
+
+export interface CompanyBatchData {
+  companies: {
+    [ticker: string]: CompanyData;
+  };
+  errors: {
+    [ticker: string]: { error: string; message: string };
+  };
+  last_updated: string;
+}
+
+export const fetchCompaniesBatch = async (tickers: string[]): Promise<CompanyBatchData> => {
+  const response = await fetch(`${API_BASE_URL}/companies/batch?tickers=${tickers.map((ticker) => encodeURIComponent(ticker)).join(',')}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch company batch: ${response.statusText}`);
+  }
+  return response.json();
+};
+
+export const fetchCompaniesComparison = async (tickers: string[]): Promise<ComparisonData> => {
+  const response = await fetch(`${API_BASE_URL}/compare?tickers=${tickers.map((ticker) => encodeURIComponent(ticker)).join(',')}`);
+  if (!response.ok) {
+    throw new Error(`Failed to fetch comparison data: ${response.statusText}`);
+  }
+  return response.json();
+};
@@ -0,0 +1,236 @@
+"""
+Financial Statement Providers
+Pluggable sources of raw financial statements for BEIDataScraper
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import pandas as pd
+import requests
+import yfinance as yf
+
+logger = logging.getLogger(__name__)
+
+# Statement keys every provider returns (DataFrames: line items x periods)
+STATEMENT_TYPES = ("balance_sheet", "income_statement", "cash_flow")
+
+
+def statements_to_dict(statements: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+    """Convert statement DataFrames into plain {statement: {period: {item: value}}} dicts"""
+    result = {}
+    for statement_type in STATEMENT_TYPES:
+        frame = statements.get(statement_type)
+        periods = {}
+        if frame is not None and not frame.empty:
+            for column in frame.columns:
+                period_key = pd.Timestamp(column).strftime('%Y-%m-%d')
+                periods[period_key] = {
+                    str(item): (None if pd.isna(value) else float(value))
+                    for item, value in frame[column].items()
+                }
+        result[statement_type] = periods
+    return result
+
+
+def statements_from_dict(data: Dict[str, Dict[str, Dict[str, Optional[float]]]]) -> Dict[str, pd.DataFrame]:
+    """Rebuild statement DataFrames (newest period first, like yfinance) from plain dicts"""
+    statements = {}
+    for statement_type in STATEMENT_TYPES:
+        periods = data.get(statement_type) or {}
+        if not periods:
+            statements[statement_type] = pd.DataFrame()
+            continue
+
+        frame = pd.DataFrame(periods, dtype=float)
+        frame.columns = pd.to_datetime(frame.columns)
+        statements[statement_type] = frame.sort_index(axis=1, ascending=False)
+    return statements
+
+
+class StatementProvider:
+    """Base interface for anything that can supply financial statements for a ticker"""
+
+    name = "base"
+
+    def fetch_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Return balance sheet, income statement and cash flow DataFrames, or None"""
+        raise NotImplementedError
+
+
+class YFinanceProvider(StatementProvider):
+    """Fetch statements over the network from Yahoo Finance"""
+
+    name = "yfinance"
+
+    def fetch_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Download the annual statements for a ticker"""
+        logger.info(f"Downloading statements for {ticker} from yfinance")
+
+        stock = yf.Ticker(ticker)
+        return {
+            "balance_sheet": stock.balance_sheet,
+            "income_statement": stock.financials,
+            "cash_flow": stock.cashflow
+        }
+
+
+class FixtureProvider(StatementProvider):
+    """Replay statements recorded as JSON files (one <ticker>.json per company)"""
+
+    name = "fixture"
+
+    def __init__(self, fixture_dir: str):
+        """Initialize the provider with the directory holding recorded statements"""
+        self.fixture_dir = fixture_dir
+
+    def _fixture_path(self, ticker: str) -> str:
+        return os.path.join(self.fixture_dir, f"{ticker}.json")
+
+    def fetch_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Load recorded statements for a ticker, or None if nothing was recorded"""
+        path = self._fixture_path(ticker)
+        if not os.path.exists(path):
+            logger.warning(f"No recorded statements for {ticker} in {self.fixture_dir}")
+            return None
+
+        with open(path, 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+
+        return statements_from_dict(payload.get("statements", {}))
+
+    def record(self, ticker: str, statements: Dict[str, pd.DataFrame]) -> str:
+        """Write statements for a ticker so they can be replayed later"""
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        path = self._fixture_path(ticker)
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"ticker": ticker, "statements": statements_to_dict(statements)}, f, indent=2)
+
+        logger.info(f"Recorded statements for {ticker} to {path}")
+        return path
+
+
+class SyntheticProvider(StatementProvider):
+    """
+    Generate plausible statements for any ticker, for benchmarks and load tests.
+
+    Every ticker gets the same statements on every call (seeded by ticker and
+    seed), and each call sleeps latency seconds, plus up to jitter times that,
+    to stand in for a network round trip.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, periods: int = 4, seed: int = 0):
+        """Initialize the generator"""
+        self.latency = latency
+        self.jitter = jitter
+        self.periods = periods
+        self.seed = seed
+
+    def fetch_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Simulate the upstream delay, then return the ticker's generated statements"""
+        rng = random.Random(zlib.crc32(ticker.encode("utf-8")) ^ self.seed)
+        if self.latency > 0:
+            time.sleep(self.latency * (1 + self.jitter * rng.random()))
+        return statements_from_dict(self._generate(rng))
+
+    def _generate(self, rng: random.Random) -> Dict[str, Dict[str, Dict[str, Optional[float]]]]:
+        data = {statement_type: {} for statement_type in STATEMENT_TYPES}
+        total_assets = 10 ** rng.uniform(11, 14)
+
+        for index in range(self.periods):
+            period = f"{2023 - index}-12-31"
+            total_assets *= rng.uniform(0.85, 1.05)
+            current_assets = total_assets * rng.uniform(0.2, 0.6)
+            revenue = total_assets * rng.uniform(0.1, 1.5)
+            gross_profit = revenue * rng.uniform(0.1, 0.6)
+            net_income = revenue * rng.uniform(-0.05, 0.25)
+
+            balance_sheet = {
+                "Total Assets": total_assets,
+                "Stockholders Equity": total_assets * rng.uniform(0.1, 0.6),
+                "Current Assets": current_assets,
+                "Current Liabilities": total_assets * rng.uniform(0.1, 0.4),
+                "Inventory": current_assets * rng.uniform(0.0, 0.4),
+                "Cash And Cash Equivalents": current_assets * rng.uniform(0.05, 0.5),
+                "Total Debt": total_assets * rng.uniform(0.0, 0.5)
+            }
+            income_statement = {
+                "Net Income": net_income,
+                "Total Revenue": revenue,
+                "Gross Profit": gross_profit,
+                "Cost Of Revenue": revenue - gross_profit
+            }
+            # Occasionally leave an item out so calculators exercise their fallbacks
+            for items in (balance_sheet, income_statement):
+                if rng.random() < 0.05:
+                    del items[rng.choice(sorted(items))]
+
+            data["balance_sheet"][period] = balance_sheet
+            data["income_statement"][period] = income_statement
+            data["cash_flow"][period] = {
+                "Operating Cash Flow": net_income * rng.uniform(0.5, 1.8),
+                "Free Cash Flow": net_income * rng.uniform(-0.5, 1.2)
+            }
+
+        return data
+
+
+class HTTPProvider(StatementProvider):
+    """
+    Fetch statements from an HTTP service speaking the fixture format
+    (GET <base_url>/statements/<ticker> -> {"ticker", "statements"}), such as
+    the stand-in upstream used by the load-test harness.
+    """
+
+    name = "http"
+
+    def __init__(self, base_url: str, timeout: float = 10.0):
+        """Initialize the provider with the service's base URL"""
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        # Peer fetches run on worker threads; each keeps its own connection pool
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def fetch_statements(self, ticker: str) -> Optional[Dict[str, pd.DataFrame]]:
+        """Download a ticker's statements; None if the service has none, raises on other failures"""
+        response = self._session().get(f"{self.base_url}/statements/{ticker}", timeout=self.timeout)
+        if response.status_code == 404:
+            logger.warning(f"No statements for {ticker} at {self.base_url}")
+            return None
+        response.raise_for_status()
+
+        return statements_from_dict(response.json().get("statements", {}))
+
+
+def create_provider(name: str, fixture_dir: Optional[str] = None, latency: float = 0.0,
+                    url: Optional[str] = None, timeout: float = 10.0) -> StatementProvider:
+    """Build a statement provider from its configured name"""
+    if name == YFinanceProvider.name:
+        return YFinanceProvider()
+    if name == FixtureProvider.name:
+        if not fixture_dir:
+            raise ValueError("fixture provider requires a fixture directory")
+        return FixtureProvider(fixture_dir)
+    if name == SyntheticProvider.name:
+        return SyntheticProvider(latency=latency)
+    if name == HTTPProvider.name:
+        if not url:
+            raise ValueError("http provider requires an upstream URL")
+        return HTTPProvider(url, timeout=timeout)
+
+    raise ValueError(f"Unknown statement provider: {name}")
@@ -0,0 +1,106 @@
+"""
+Persistent Statement Store
+SQLite-backed storage of raw financial statements keyed by ticker and period
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import time
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from statement_providers import STATEMENT_TYPES, statements_from_dict, statements_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class StatementStore:
+    """On-disk statement store so a cold process can serve without the network"""
+
+    def __init__(self, db_path: str, max_age: Optional[float] = None):
+        """
+        Initialize the store.
+
+        max_age is the number of seconds after which stored statements are
+        considered outdated and refetched; None keeps them forever.
+        """
+        self.db_path = db_path
+        self.max_age = max_age
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS statements (
+                    ticker TEXT NOT NULL,
+                    statement TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    items TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (ticker, statement, period)
+                )
+            """)
+
+        logger.info(f"Statement store ready at {db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        # A short-lived connection per operation keeps the store safe to use
+        # from request threads and from several worker processes at once
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def load(self, ticker: str, allow_outdated: bool = False) -> Optional[Dict[str, pd.DataFrame]]:
+        """
+        Return stored statements for a ticker, or None if missing or (unless
+        allow_outdated) older than max_age
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT statement, period, items, fetched_at FROM statements WHERE ticker = ?",
+                (ticker,)
+            ).fetchall()
+
+        if not rows:
+            return None
+
+        if self.max_age is not None and not allow_outdated:
+            newest = max(row[3] for row in rows)
+            if time.time() - newest > self.max_age:
+                logger.info(f"Stored statements for {ticker} are outdated")
+                return None
+
+        data = {statement_type: {} for statement_type in STATEMENT_TYPES}
+        for statement, period, items, _ in rows:
+            data.setdefault(statement, {})[period] = json.loads(items)
+
+        return statements_from_dict(data)
+
+    def save(self, ticker: str, statements: Dict[str, pd.DataFrame]) -> None:
+        """Persist every period of every statement for a ticker"""
+        fetched_at = time.time()
+        rows = []
+        for statement, periods in statements_to_dict(statements).items():
+            for period, items in periods.items():
+                rows.append((ticker, statement, period, json.dumps(items), fetched_at))
+
+        if not rows:
+            return
+
+        with self._connect() as conn:
+            conn.execute("DELETE FROM statements WHERE ticker = ?", (ticker,))
+            conn.executemany(
+                "INSERT INTO statements (ticker, statement, period, items, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+
+        logger.info(f"Stored {len(rows)} statement periods for {ticker}")
+
+    def tickers(self) -> List[str]:
+        """List every ticker that has stored statements"""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT ticker FROM statements ORDER BY ticker").fetchall()
+        return [row[0] for row in rows]
@@ -0,0 +1,112 @@
+"""
+Request Tracing
+Opt-in per-request timing trees built from nested spans
+"""
+
+import contextvars
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar('findash_trace_span', default=None)
+
+
+class Span:
+    """One timed step of a traced request and the steps it ran"""
+
+    __slots__ = ("name", "attrs", "started", "duration", "children", "root_started", "_lock")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], root_started: Optional[float] = None):
+        self.name = name
+        self.attrs = attrs
+        self.started = time.perf_counter()
+        self.root_started = self.started if root_started is None else root_started
+        self.duration: Optional[float] = None
+        self.children = []
+        # Peer fetches run on worker threads and attach to the same parent
+        self._lock = threading.Lock()
+
+    def _add_child(self, child: "Span") -> None:
+        with self._lock:
+            self.children.append(child)
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self.started
+
+    def to_dict(self) -> Dict[str, Any]:
+        """The span tree with start offsets and durations in milliseconds"""
+        with self._lock:
+            children = list(self.children)
+        return {
+            "name": self.name,
+            **self.attrs,
+            "start_ms": round((self.started - self.root_started) * 1000, 3),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "children": [child.to_dict() for child in children]
+        }
+
+
+def tracing_active() -> bool:
+    """True while the current context belongs to a traced request"""
+    return _current_span.get() is not None
+
+
+def start_trace(name: str, **attrs: Any) -> Tuple[Span, contextvars.Token]:
+    """Begin tracing the current context; pass both results to finish_trace"""
+    root = Span(name, attrs)
+    return root, _current_span.set(root)
+
+
+def finish_trace(root: Span, token: contextvars.Token) -> Dict[str, Any]:
+    """Stop tracing and return the timing tree"""
+    root.finish()
+    _current_span.reset(token)
+    return root.to_dict()
+
+
+def open_span(name: str, **attrs: Any) -> Optional[Tuple[Span, contextvars.Token]]:
+    """Start a child of the current span; a no-op returning None when not tracing"""
+    parent = _current_span.get()
+    if parent is None:
+        return None
+    child = Span(name, attrs, parent.root_started)
+    parent._add_child(child)
+    return child, _current_span.set(child)
+
+
+def close_span(opened: Optional[Tuple[Span, contextvars.Token]]) -> None:
+    """Finish a span returned by open_span"""
+    if opened is None:
+        return
+    child, token = opened
+    child.finish()
+    _current_span.reset(token)
+
+
+def annotate(**attrs: Any) -> None:
+    """Attach attributes (ticker, cache status, ...) to the current span, if tracing"""
+    current = _current_span.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+class span:
+    """with span("name", ticker=...): times a block into the current trace"""
+
+    __slots__ = ("name", "attrs", "_opened")
+
+    def __init__(self, name: str, **attrs: Any):
+        self.name = name
+        self.attrs = attrs
+        self._opened = None
+
+    def __enter__(self) -> "span":
+        self._opened = open_span(self.name, **self.attrs)
+        return self
+
+    def __exit__(self, *exc_info) -> bool:
+        close_span(self._opened)
+        return False
@@ -0,0 +1,105 @@
+"""
+Request-scoped Unit of Work
+Memoizes statement fetches and ratio calculations for the lifetime of one request
+"""
+
+import contextvars
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from tracing import annotate, span
+
+logger = logging.getLogger(__name__)
+
+_current_unit_of_work: contextvars.ContextVar = contextvars.ContextVar('findash_unit_of_work', default=None)
+
+
+class _MemoEntry:
+    """One memoized computation; its lock makes concurrent callers wait for the first"""
+
+    __slots__ = ("lock", "done", "value")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.done = False
+        self.value = None
+
+
+class UnitOfWork:
+    """Per-request memo so each ticker is fetched and computed at most once"""
+
+    def __init__(self):
+        """Initialize an empty memo and its counters"""
+        self._lock = threading.Lock()
+        self._entries: Dict[Any, _MemoEntry] = {}
+
+        # computations[kind] counts real work, hits[kind] counts memo hits
+        self.computations = Counter()
+        self.hits = Counter()
+
+    def memoize(self, kind: str, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the memoized value for (kind, key), computing it on first use"""
+        with self._lock:
+            entry = self._entries.get((kind, key))
+            if entry is None:
+                entry = self._entries[(kind, key)] = _MemoEntry()
+
+        # Traced requests show every lookup, and whether it reused earlier work
+        with span(kind, key=key), entry.lock:
+            if entry.done:
+                with self._lock:
+                    self.hits[kind] += 1
+                annotate(memo="hit")
+                return entry.value
+
+            entry.value = compute()
+            entry.done = True
+            with self._lock:
+                self.computations[kind] += 1
+            annotate(memo="miss")
+            return entry.value
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Counters describing how much work this unit did and how much it saved"""
+        with self._lock:
+            return {
+                "computations": dict(self.computations),
+                "hits": dict(self.hits)
+            }
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    """Return the unit of work active in this context, if any"""
+    return _current_unit_of_work.get()
+
+
+def begin_unit_of_work() -> Tuple[UnitOfWork, contextvars.Token]:
+    """Activate a fresh unit of work; pass the token to end_unit_of_work"""
+    uow = UnitOfWork()
+    return uow, _current_unit_of_work.set(uow)
+
+
+def end_unit_of_work(token: contextvars.Token) -> None:
+    """Deactivate the unit of work started with the given token"""
+    uow = _current_unit_of_work.get()
+    _current_unit_of_work.reset(token)
+    if uow is not None:
+        logger.debug(f"Unit of work finished: {uow.summary()}")
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """Open a unit of work, or join the one already active in this context"""
+    existing = _current_unit_of_work.get()
+    if existing is not None:
+        yield existing
+        return
+
+    uow, token = begin_unit_of_work()
+    try:
+        yield uow
+    finally:
+        end_unit_of_work(token)